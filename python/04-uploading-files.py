@@ -1,124 +1,122 @@
-import os
 import asyncio
-import requests
-import time
+from freeconvert import FreeConvertClient, JobPoller, bulk_upload
 
 # You can generate FreeConvert API key from your user account dashboard.
 # Read more at FreeConvert API reference docs: https://www.freeconvert.com/api/v1/
 api_key = "my_api_key"
-base_url = "https://api.freeconvert.com/v1"
 upload_file_path = "myvideo.mp4"
+bulk_upload_file_paths = ["myvideo1.mp4", "myvideo2.mp4", "myvideo3.mp4"]
 
-freeconvert = requests.Session()
-freeconvert.headers.update({
-    "Content-Type": "application/json",
-    "Accept": "application/json",
-    "Authorization": f"Bearer {api_key}",
-})
+# One pooled async client shared by the whole script.
+freeconvert = FreeConvertClient(api_key)
 
-def upload_example1():
+# Polls every watched job from one loop: quick checks at first, then exponential backoff.
+poller = JobPoller(freeconvert, timeout=600)
+
+async def upload_example1():
     print("upload example 1")
 
     # Create an import/upload task
-    upload_task_response = freeconvert.post(f"{base_url}/process/import/upload")
-    upload_task_id = upload_task_response.json()["id"]
-    uploader_form = upload_task_response.json()["result"]["form"]
+    upload_task = await freeconvert.create_task("import/upload")
+    upload_task_id = upload_task["id"]
+    uploader_form = upload_task["result"]["form"]
     print("Created task", upload_task_id)
 
-    # Attach required form parameters and the file
-    formdata = {}
-    for parameter, value in uploader_form["parameters"].items():
-        formdata[parameter] = value
-    files = {'file': open(upload_file_path,'rb')}
-
     # Submit the upload as multipart/form-data request.
-    upload_response = requests.post(uploader_form["url"], files=files, data=formdata)
-    upload_response.raise_for_status()
+    # The file is streamed from disk in fixed-size chunks, so memory use doesn't grow with file size.
+    upload = await freeconvert.upload(uploader_form, upload_file_path, progress=print_progress)
+    print("Uploaded", upload)
 
     # Use the uploaded file in a job.
     # Job will complete when all its children and dependent tasks are complete.
-    job_response = freeconvert.post(f"{base_url}/process/jobs", json={
-        "tasks": {
-            "myConvert1": {
-                "operation": "convert",
-                "input": upload_task_id,
-                "output_format": "mp3",
-            },
-            "myExport1": {
-                "operation": "export/url",
-                "input": "myConvert1",
-                "filename": "my-converted-file.mp3",
-            },
+    job = await freeconvert.create_job({
+        "myConvert1": {
+            "operation": "convert",
+            "input": upload_task_id,
+            "output_format": "mp3",
+        },
+        "myExport1": {
+            "operation": "export/url",
+            "input": "myConvert1",
+            "filename": "my-converted-file.mp3",
         },
     })
-    job = job_response.json()
     print("Job created", job["id"])
 
     # Job will proceed as soon as the upload is finished.
     # We need to wait for job completion/failure using polling or websocket (see relevant code examples).
-    wait_for_job_by_polling(job["id"])
+    await wait_for_job_by_polling(job["id"])
 
-def upload_example2():
+async def upload_example2():
     print("upload example 2")
 
     # Upload, convert, export all inside same job
-    job_response = freeconvert.post(f"{base_url}/process/jobs", json={
-        "tasks": {
-            "myUpload1": {
-                "operation": "import/upload",
-            },
-            "myConvert1": {
-                "operation": "convert",
-                "input": "myUpload1",
-                "output_format": "mp3",
-            },
-            "myExport1": {
-                "operation": "export/url",
-                "input": "myConvert1",
-                "filename": "my-converted-file.mp3",
-            },
+    job = await freeconvert.create_job({
+        "myUpload1": {
+            "operation": "import/upload",
+        },
+        "myConvert1": {
+            "operation": "convert",
+            "input": "myUpload1",
+            "output_format": "mp3",
+        },
+        "myExport1": {
+            "operation": "export/url",
+            "input": "myConvert1",
+            "filename": "my-converted-file.mp3",
         },
     })
-    job = job_response.json()
     print("Job created", job["id"])
 
-    # Attach required form parameters and the file for file upload.
+    # Submit the upload as multipart/form-data request, using the form of the job's upload task.
     upload_task = next(task for task in job["tasks"] if task["name"] == "myUpload1")
-    uploader_form = upload_task["result"]["form"]
-    formdata = {}
-    for parameter, value in uploader_form["parameters"].items():
-        formdata[parameter] = value
-    files = {'file': open(upload_file_path,'rb')}
-
-    # Submit the upload as multipart/form-data request.
-    upload_response = requests.post(uploader_form["url"], files=files, data=formdata)
-    upload_response.raise_for_status()
+    upload = await freeconvert.upload(upload_task["result"]["form"], upload_file_path, progress=print_progress)
+    print("Uploaded", upload)
 
     # Job will proceed as soon as the upload is finished.
     # We need to wait for job completion/failure using polling or websocket (see relevant code examples).
-    wait_for_job_by_polling(job["id"])
-
-def wait_for_job_by_polling(job_id):
-    for _ in range(10):
-        time.sleep(2)
-        job_get_response = freeconvert.get(f"{base_url}/process/jobs/{job_id}")
-        job = job_get_response.json()
-
-        if job["status"] == "completed":
-            export_task = next(task for task in job["tasks"] if task["name"] == "myExport1")
-            print("Downloadable converted file url:", export_task["result"]["url"])
-            return
-        elif job["status"] == "failed":
-            raise Exception("Job failed")
-
-    raise Exception("Poll timeout")
-
-def app():
-    upload_example1()
-    upload_example2()
+    await wait_for_job_by_polling(job["id"])
+
+async def upload_example3():
+    print("upload example 3")
+
+    # Upload, convert, export many files with a single job.
+    # One job is created with an import/upload, convert and export/url task per file,
+    # then the files are uploaded in parallel (at most 4 at a time).
+    async for item in bulk_upload(freeconvert, bulk_upload_file_paths, "mp3", workers=4, poller=poller):
+        if item.error:
+            print(f"{item.path} failed: {item.error}")
+        else:
+            print(f"{item.path} converted. url: {item.result['result']['url']}")
+
+def print_progress(progress):
+    # Called after every uploaded chunk with bytes sent so far and current throughput.
+    print(f"Uploading... {progress.fraction:.0%} ({progress.throughput / 1e6:.1f} MB/s)", end="\r")
+
+async def wait_for_job_by_polling(job_id):
+    # Raises TimeoutError if the job is still running after the poller's timeout.
+    job = await poller.wait_for_job(job_id)
+
+    if job["status"] == "completed":
+        export_task = next(task for task in job["tasks"] if task["name"] == "myExport1")
+        print("Downloadable converted file url:", export_task["result"]["url"])
+    else:
+        raise Exception("Job failed")
+
+async def app():
+    await upload_example1()
+    await upload_example2()
+    await upload_example3()
+
+async def main():
+    try:
+        await app()
+    finally:
+        await poller.close()
+        await freeconvert.close()
 
 if __name__ == "__main__":
     try:
-        app()
+        asyncio.run(main())
     except Exception as e:
-        print(e)
\ No newline at end of file
+        print(e)
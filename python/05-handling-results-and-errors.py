@@ -1,46 +1,52 @@
-import os
-import requests
-import time
+import asyncio
+from freeconvert import FreeConvertClient, JobPoller, PreflightError, RateGovernor, plan_retry, preflight_job
 
 # You can generate FreeConvert API key from your user account dashboard.
 # Read more at FreeConvert API reference docs: https://www.freeconvert.com/api/v1/
 api_key = "my_api_key"
-base_url = "https://api.freeconvert.com/v1"
 
-freeconvert = requests.Session()
-freeconvert.headers.update({
-    "Content-Type": "application/json",
-    "Accept": "application/json",
-    "Authorization": f"Bearer {api_key}"
-})
+# One pooled async client shared by the whole script.
+# The governor paces requests per endpoint class, honours HTTP 429 / Retry-After,
+# and retries status reads on 429/5xx with jittered backoff before raising.
+freeconvert = FreeConvertClient(api_key, governor=RateGovernor())
 
-def app():
-    
-    job_response = freeconvert.post(f"{base_url}/process/jobs", json={
-        "tasks": {
-            "myImport1": {
-                "operation": "import/url",
-                "url": "https://cdn.freeconvert.com/logo_theme.svg",
-                "filename": "logo.svg",
-            },
-            "myConvert1": {
-                "operation": "convert",
-                "input": "myImport1",
-                # Deliberately treat the input file as 'mp4' to cause a failure. (the input file is actually a 'svg' image)
-                "input_format": "mp4",
-                "output_format": "mp3",
-            },
-            "myExport1": {
-                "operation": "export/url",
-                "input": "myConvert1",
-            },
-        }
-    })
-    job_response.raise_for_status()
-    job_id = job_response.json()["id"]
+# Polls every watched job from one loop: quick checks at first, then exponential backoff.
+poller = JobPoller(freeconvert, timeout=600)
+
+async def app():
+    # API errors (non-2xx responses) are raised as FreeConvertError by the client.
+    tasks = {
+        "myImport1": {
+            "operation": "import/url",
+            "url": "https://cdn.freeconvert.com/logo_theme.svg",
+            "filename": "logo.svg",
+        },
+        "myConvert1": {
+            "operation": "convert",
+            "input": "myImport1",
+            # Deliberately treat the input file as 'mp4' to cause a failure. (the input file is actually a 'svg' image)
+            "input_format": "mp4",
+            "output_format": "mp3",
+        },
+        "myExport1": {
+            "operation": "export/url",
+            "input": "myConvert1",
+        },
+    }
+    # A preflight reads the first KB of each import (a small Range GET for URLs) and checks the declared
+    # formats against the actual bytes, so this mistake could be caught before the job uses any quota.
+    # Wrong input formats it can fix are fixed; here the SVG can't be converted to mp3 at all.
+    try:
+        await preflight_job(freeconvert.session, tasks)
+    except PreflightError as e:
+        print(e)
+
+    # Submit it anyway, to show how the API reports the failure.
+    job_response = await freeconvert.create_job(tasks)
+    job_id = job_response["id"]
     print("Created job", job_id)
 
-    job = wait_for_job_by_polling(job_id)
+    job = await wait_for_job_by_polling(job_id)
 
     # Print any success or failure results:
     if job["status"] == "completed":
@@ -54,19 +60,26 @@ def app():
         else:
             print(f"Task {t['name']} failed. [{t['result']['errorCode']}] - {t['result']['msg'].strip()}")
 
-def wait_for_job_by_polling(job_id):
-    for _ in range(10):
-        time.sleep(2)
-        job_get_response = freeconvert.get(f"{base_url}/process/jobs/{job_id}")
-        job_get_response.raise_for_status()
-        job = job_get_response.json()
-        if job["status"] == "completed" or job["status"] == "failed":
-            # Return the latest job information.
-            return job
-    raise TimeoutError("Poll timeout")
+    # Rather than resubmitting the whole job, a retry can rerun only the failed branch and pass completed
+    # tasks to the new job by ID (see run_with_retries). This failure isn't transient, so just show the plan.
+    if job["status"] != "completed":
+        plan = plan_retry(job, tasks)
+        print(f"A retry would rerun {plan.rerun} and reuse {plan.reused}")
+
+async def wait_for_job_by_polling(job_id):
+    # Resolves once the job is 'completed' or 'failed' and returns the latest job information.
+    # Raises TimeoutError if the job is still running after the poller's timeout.
+    return await poller.wait_for_job(job_id)
+
+async def main():
+    try:
+        await app()
+    finally:
+        await poller.close()
+        await freeconvert.close()
 
 if __name__ == "__main__":
     try:
-        app()
+        asyncio.run(main())
     except Exception as e:
         print(e)
\ No newline at end of file
@@ -1,31 +1,21 @@
-import os
 import asyncio
-import requests
-import socketio
+from freeconvert import FreeConvertClient, JobGraph, NotificationHub, download_exports
 
 # You can generate FreeConvert API key from your user account dashboard.
 # Read more at FreeConvert API reference docs: https://www.freeconvert.com/api/v1/
 api_key = "my_api_key"
-base_url = "https://api.freeconvert.com/v1"
 
-freeconvert = requests.Session()
-freeconvert.headers.update({
-    "Content-Type": "application/json",
-    "Accept": "application/json",
-    "Authorization": f"Bearer {api_key}"
-})
+# One pooled async client shared by the whole script.
+freeconvert = FreeConvertClient(api_key)
 
-async def app():
-    #
-    # Initialize a websocket connection to FreeConvert notification service, using socket.io client library.
-    # Read more: https://www.freeconvert.com/api/v1/#freeconvert-com-api-socket
-    #
-    sio = socketio.Client()
-    sio.connect("https://notification.freeconvert.com", transports=["websocket"],  auth={"token": f"Bearer {api_key}"})
-
-    # Event to signal when all is completed
-    listening_finished = asyncio.Event()
+#
+# A single websocket connection to FreeConvert notification service, using the asyncio socket.io client library.
+# If the connection drops, it reconnects and settles missed events through the REST client.
+# Read more: https://www.freeconvert.com/api/v1/#freeconvert-com-api-socket
+#
+notifications = NotificationHub(api_key, client=freeconvert)
 
+async def app():
     # This job achieves the following:
     #
     # Generate a PDF containing 3 images as 3 pages.
@@ -36,129 +26,118 @@ async def app():
     # Archive the PDF and the thumbnail to a zip package.
     #
     # Check out FreeConvert Job Builder to help build complex workflows: https://www.freeconvert.com/api/job-builder
-
-    job_response = freeconvert.post(f"{base_url}/process/jobs", json={
-        "tasks": {
-            # Import FreeConvert webpage.
-            "fcWebpage": {
-                "operation": "import/webpage",
-                "url": "https://www.freeconvert.com",
-            },
-            # Convert the webpage to a png.
-            "webpageScreenshot": {
-                "operation": "convert",
-                "input": "fcWebpage",
-                "output_format": "png",
-                "options": {
-                    "viewport_width": 300,
-                    "png_compression_level": "lossy",
-                    "png_convert_quality": 80,
-                },
-            },
-            # Import an image of dice roll.
-            "diceImage": {
-                "operation": "import/url",
-                "url": "https://upload.wikimedia.org/wikipedia/commons/thumb/4/47/PNG_transparency_demonstration_1.png/280px-PNG_transparency_demonstration_1.png",
-            },
-            # Import an image of a tree.
-            "treeImage": {
-                "operation": "import/url",
-                "url": "https://upload.wikimedia.org/wikipedia/commons/thumb/c/ca/Larix_decidua_Aletschwald.jpg/800px-Larix_decidua_Aletschwald.jpg",
-            },
-            # Merge the 3 images to a PDF.
-            "mergedPdf": {
-                "operation": "merge",
-                "input": ["webpageScreenshot", "diceImage", "treeImage"],
-                "output_format": "pdf",
-                "options": {
-                    "pdf_page_size": "1240.2x1753.95",
-                    "pdf_orientation": "portrait",
-                    "pdf_image_alignment": "Center",
-                    "enlarge_images_to_fit": True,
-                },
-            },
-            # Convert dice image to a small jpg to be used as a thumbnail with orange background.
-            "thumbnail": {
-                "operation": "convert",
-                "input": "diceImage",
-                "output_format": "jpg",
-                "options": {
-                    "image_resize_percentage": 60,
-                    "background": "#FF9900",
-                    "jpg_convert_compression_level": 80,
-                },
+    #
+    # The tasks are wrapped in a JobGraph, so a typo in an `input` name, a cycle or an unused task
+    # is reported locally (as JobGraphError) before anything is sent to the API.
+
+    job_graph = JobGraph({
+        # Import FreeConvert webpage.
+        "fcWebpage": {
+            "operation": "import/webpage",
+            "url": "https://www.freeconvert.com",
+        },
+        # Convert the webpage to a png.
+        "webpageScreenshot": {
+            "operation": "convert",
+            "input": "fcWebpage",
+            "output_format": "png",
+            "options": {
+                "viewport_width": 300,
+                "png_compression_level": "lossy",
+                "png_convert_quality": 80,
             },
-            # Export the thumbnail to get the desired filename (instead of auto-generated GUID filename).
-            "thumbnailExport": {
-                "operation": "export/url",
-                "input": "thumbnail",
-                "filename": "Thumbnail.jpg",
+        },
+        # Import an image of dice roll.
+        "diceImage": {
+            "operation": "import/url",
+            "url": "https://upload.wikimedia.org/wikipedia/commons/thumb/4/47/PNG_transparency_demonstration_1.png/280px-PNG_transparency_demonstration_1.png",
+        },
+        # Import an image of a tree.
+        "treeImage": {
+            "operation": "import/url",
+            "url": "https://upload.wikimedia.org/wikipedia/commons/thumb/c/ca/Larix_decidua_Aletschwald.jpg/800px-Larix_decidua_Aletschwald.jpg",
+        },
+        # Merge the 3 images to a PDF.
+        "mergedPdf": {
+            "operation": "merge",
+            "input": ["webpageScreenshot", "diceImage", "treeImage"],
+            "output_format": "pdf",
+            "options": {
+                "pdf_page_size": "1240.2x1753.95",
+                "pdf_orientation": "portrait",
+                "pdf_image_alignment": "Center",
+                "enlarge_images_to_fit": True,
             },
-            # Final export of the thumbnail and the PDF as a Zip archive.
-            "finalExport": {
-                "operation": "export/url",
-                "input": ["thumbnailExport", "mergedPdf"],
-                "archive_multiple_files": True,
-                "filename": "FinalPackage.zip",
+        },
+        # Convert dice image to a small jpg to be used as a thumbnail with orange background.
+        "thumbnail": {
+            "operation": "convert",
+            "input": "diceImage",
+            "output_format": "jpg",
+            "options": {
+                "image_resize_percentage": 60,
+                "background": "#FF9900",
+                "jpg_convert_compression_level": 80,
             },
-        }
+        },
+        # Export the thumbnail to get the desired filename (instead of auto-generated GUID filename).
+        "thumbnailExport": {
+            "operation": "export/url",
+            "input": "thumbnail",
+            "filename": "Thumbnail.jpg",
+        },
+        # Final export of the thumbnail and the PDF as a Zip archive.
+        "finalExport": {
+            "operation": "export/url",
+            "input": ["thumbnailExport", "mergedPdf"],
+            "archive_multiple_files": True,
+            "filename": "FinalPackage.zip",
+        },
     })
-    job_response.raise_for_status()
 
-    job = job_response.json()
+    critical_path, _ = job_graph.critical_path()
+    print("Critical path:", " -> ".join(critical_path))
+    print("Up to", job_graph.parallel_width(), "tasks can run in parallel")
+
+    job = await freeconvert.create_job(job_graph)
     job_id = job["id"]
     print("Created job", job_id)
     print("Waiting for job updates....")
 
-    @sio.on("task_started")
-    def on_task_started(data):
+    # Subscribe to the job and also its children tasks.
+    # Channels are unsubscribed automatically as tasks and the job finish.
+    # Each export is downloaded as soon as its task_completed event arrives, using the URL in the
+    # event, so Thumbnail.jpg is on disk while the PDF is still being merged and no extra job fetch
+    # is needed at the end. Large files are fetched as parallel byte ranges and an interrupted
+    # download resumes where it left off when run again.
+    job, downloads = await download_exports(
+        notifications, freeconvert, job, ".", task_ids=[task["id"] for task in job["tasks"]], on_event=print_event
+    )
+
+    for name, path in downloads.items():
+        print("Downloaded", name, "to", path)
+
+def print_event(event, data):
+    if event == "task_started":
         print("Task started", data["name"])
-
-    @sio.on("task_completed")
-    def on_task_completed(data):
+    elif event == "task_completed":
         print("Task completed", data["name"])
-        sio.emit("unsubscribe", f"task.{data['id']}")
-
-    @sio.on("task_failed")
-    def on_task_failed(data):
+    elif event == "task_failed":
         print("Task failed", data["name"])
-        sio.emit("unsubscribe", f"task.{data['id']}")
-
-    @sio.on("job_completed")
-    def on_job_completed(data):
+    elif event == "job_completed":
         print("Job completed", data["id"])
-        sio.emit("unsubscribe", f"job.{data['id']}")
-        sio.disconnect()
-        listening_finished._loop.call_soon_threadsafe(listening_finished.set)
-
-    @sio.on("job_failed")
-    def on_job_failed(data):
+    elif event == "job_failed":
         print("Job failed", data["id"])
-        sio.emit("unsubscribe", f"job.{data['id']}")
-        sio.disconnect()
-        listening_finished._loop.call_soon_threadsafe(listening_finished.set)
 
-    # Subscribe to the job and also its children tasks.
-    sio.emit("subscribe", f"job.{job_id}")
-    for task in job["tasks"]:
-        taskId = task["id"]
-        sio.emit("subscribe", f"task.{taskId}")
-
-    await listening_finished.wait()
-
-    display_results(job["id"])
-
-def display_results(job_id):
-    job_get_response = freeconvert.get(f"{base_url}/process/jobs/{job_id}")
-    job = job_get_response.json()
-
-    if job["status"] == "completed":
-        export_task = next((t for t in job["tasks"] if t["name"] == "finalExport"), None)
-        if export_task:
-            print(export_task["result"]["url"])
+async def main():
+    try:
+        await app()
+    finally:
+        await notifications.close()
+        await freeconvert.close()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(app())
+        asyncio.run(main())
     except Exception as e:
         print(e)
\ No newline at end of file
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import inspect
+import random
+import time
+import uuid
+
+import socketio
+from aiohttp import web
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Relative processing time of each operation, multiplied by the server's `delay`.
+OPERATION_FACTORS = {
+    "import": 0.5,
+    "convert": 2.0,
+    "merge": 2.0,
+    "export": 0.5,
+}
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _maybe_await(result):
+    # enter_room/leave_room became coroutines in later python-socketio releases.
+    return result if inspect.isawaitable(result) else asyncio.sleep(0)
+
+
+class MockFreeConvert:
+    #
+    # Local stand-in for the FreeConvert API and notification service.
+    #
+    # Implements POST /v1/process/jobs, POST /v1/process/{operation} for single
+    # tasks, GET /v1/process/tasks/{id} and /v1/process/jobs/{id}, a multipart
+    # upload target for import/upload forms, export file downloads, and the
+    # socket.io `subscribe`/`unsubscribe` channels with task_* and job_* events.
+    # Each task takes `delay` seconds (scaled per operation, +/- `jitter`) once its
+    # inputs are done and fails with probability `failure_rate`.
+    #
+    def __init__(self, delay=0.1, jitter=0.5, failure_rate=0.0, export_size=64 * 1024):
+        self.delay = delay
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.export_size = export_size
+        self.base_url = None
+        self.requests = 0
+        self.jobs = {}
+        self.tasks = {}
+        self._done = {}
+        self._uploaded = {}
+        self._runner = None
+        self._export_body = b"\0" * export_size
+
+        self.sio = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*")
+        self.app = web.Application(middlewares=[self._count_requests], client_max_size=1024 ** 4)
+        self.sio.attach(self.app)
+        self.sio.on("connect", handler=self._on_connect)
+        self.sio.on("subscribe", handler=self._on_subscribe)
+        self.sio.on("unsubscribe", handler=self._on_unsubscribe)
+        self.app.router.add_post("/v1/process/jobs", self._create_job)
+        self.app.router.add_get("/v1/process/jobs/{id}", self._get_job)
+        self.app.router.add_get("/v1/process/tasks/{id}", self._get_task)
+        self.app.router.add_post("/v1/process/{operation:.+}", self._create_task)
+        self.app.router.add_post("/upload/{id}", self._upload)
+        self.app.router.add_get("/files/{id}/{filename}", self._download)
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def _count_requests(self, request, handler):
+        if not request.path.startswith("/socket.io"):
+            self.requests += 1
+        return await handler(request)
+
+    # Socket.io
+
+    async def _on_connect(self, sid, environ, auth=None):
+        return True
+
+    async def _on_subscribe(self, sid, channel):
+        await _maybe_await(self.sio.enter_room(sid, channel))
+
+    async def _on_unsubscribe(self, sid, channel):
+        await _maybe_await(self.sio.leave_room(sid, channel))
+
+    # REST
+
+    async def _create_job(self, request):
+        body = await request.json()
+        job_id = uuid.uuid4().hex[:24]
+        job = {"id": job_id, "status": "processing", "createdAt": time.time(), "tasks": []}
+        self.jobs[job_id] = job
+
+        ids = {name: uuid.uuid4().hex[:24] for name in body.get("tasks", {})}
+        for name, payload in body.get("tasks", {}).items():
+            inputs = [ids.get(value, value) for value in _as_list(payload.get("input"))]
+            job["tasks"].append(self._new_task(ids[name], name, payload, inputs, job_id))
+        for task in job["tasks"]:
+            asyncio.ensure_future(self._process(task))
+        return web.json_response(self._job_document(job))
+
+    async def _create_task(self, request):
+        operation = request.match_info["operation"]
+        payload = await request.json() if request.can_read_body else {}
+        payload["operation"] = operation
+        task = self._new_task(uuid.uuid4().hex[:24], None, payload, _as_list(payload.get("input")), None)
+        asyncio.ensure_future(self._process(task))
+        return web.json_response(task)
+
+    async def _get_job(self, request):
+        job = self.jobs.get(request.match_info["id"])
+        if job is None:
+            return web.json_response({"message": "Job not found"}, status=404)
+        return web.json_response(self._job_document(job))
+
+    async def _get_task(self, request):
+        task = self.tasks.get(request.match_info["id"])
+        if task is None:
+            return web.json_response({"message": "Task not found"}, status=404)
+        return web.json_response(task)
+
+    async def _upload(self, request):
+        task_id = request.match_info["id"]
+        if task_id not in self._uploaded:
+            return web.json_response({"message": "Unknown upload"}, status=404)
+        reader = await request.multipart()
+        received = 0
+        async for part in reader:
+            while True:
+                chunk = await part.read_chunk(256 * 1024)
+                if not chunk:
+                    break
+                received += len(chunk)
+        self._uploaded[task_id].set()
+        return web.json_response({"received": received})
+
+    async def _download(self, request):
+        # Honors single Range requests like object storage does, so ranged downloads can be exercised.
+        body = self._export_body
+        headers = {"Accept-Ranges": "bytes", "ETag": '"mock-export"'}
+        if "Range" not in request.headers:
+            return web.Response(body=body, headers=headers, content_type="application/octet-stream")
+        try:
+            requested = request.http_range
+        except ValueError:
+            return web.Response(status=416, headers={**headers, "Content-Range": f"bytes */{len(body)}"})
+        start = requested.start or 0
+        start = max(0, len(body) + start) if start < 0 else start
+        stop = min(requested.stop if requested.stop is not None else len(body), len(body))
+        if start >= stop:
+            return web.Response(status=416, headers={**headers, "Content-Range": f"bytes */{len(body)}"})
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{len(body)}"
+        return web.Response(status=206, body=body[start:stop], headers=headers, content_type="application/octet-stream")
+
+    # Processing
+
+    def _new_task(self, task_id, name, payload, inputs, job_id):
+        task = {
+            "id": task_id,
+            "name": name,
+            "job": job_id,
+            "operation": payload["operation"],
+            "status": "created",
+            "payload": payload,
+            "dependsOn": inputs,
+            "result": {},
+        }
+        if payload["operation"] == "import/upload":
+            self._uploaded[task_id] = asyncio.Event()
+            task["result"] = {"form": {"url": f"{self.base_url}/upload/{task_id}", "parameters": {"signature": task_id}}}
+        self.tasks[task_id] = task
+        self._done[task_id] = asyncio.Event()
+        return task
+
+    def _job_document(self, job):
+        return {**job, "tasks": [self.tasks[task["id"]] for task in job["tasks"]]}
+
+    async def _process(self, task):
+        for input_id in task["dependsOn"]:
+            if input_id in self._done:
+                await self._done[input_id].wait()
+        failed_input = any(self.tasks.get(i, {}).get("status") == "failed" for i in task["dependsOn"])
+
+        if task["operation"] == "import/upload" and not failed_input:
+            await self._uploaded[task["id"]].wait()
+
+        if not failed_input:
+            task["status"] = "processing"
+            await self.sio.emit("task_started", task, room=f"task.{task['id']}")
+            factor = OPERATION_FACTORS.get(task["operation"].split("/")[0], 1.0)
+            await asyncio.sleep(self.delay * factor * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+        if failed_input or random.random() < self.failure_rate:
+            task["status"] = "failed"
+            code = "INPUT_FAILED" if failed_input else "MOCK_FAILURE"
+            task["result"] = {"errorCode": code, "msg": f"Mock {code.lower()}"}
+            await self.sio.emit("task_failed", task, room=f"task.{task['id']}")
+        else:
+            task["status"] = "completed"
+            if task["operation"].startswith("export/"):
+                filename = task["payload"].get("filename") or f"{task['id']}.bin"
+                task["result"] = {"url": f"{self.base_url}/files/{task['id']}/{filename}"}
+            await self.sio.emit("task_completed", task, room=f"task.{task['id']}")
+        self._done[task["id"]].set()
+
+        if task["job"] is not None:
+            await self._settle_job(self.jobs[task["job"]])
+
+    async def _settle_job(self, job):
+        statuses = [self.tasks[task["id"]]["status"] for task in job["tasks"]]
+        if job["status"] in TERMINAL_STATUSES or not all(status in TERMINAL_STATUSES for status in statuses):
+            return
+        failed = "failed" in statuses
+        job["status"] = "failed" if failed else "completed"
+        if failed:
+            job["result"] = {"errorCode": "TASK_FAILED", "msg": "One or more tasks failed"}
+        event = "job_failed" if failed else "job_completed"
+        await self.sio.emit(event, {"id": job["id"], "status": job["status"]}, room=f"job.{job['id']}")
+
+
+async def _serve(args):
+    server = MockFreeConvert(delay=args.delay, failure_rate=args.failure_rate)
+    base_url = await server.start(args.host, args.port)
+    print(f"Mock FreeConvert API on {base_url}/v1, notifications on {base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the mock FreeConvert API and notification server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0.1, help="base seconds per task")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
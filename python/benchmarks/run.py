@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freeconvert import FreeConvertClient, JobPoller, Metrics, NotificationHub, UploadTransport  # noqa: E402
+
+from benchmarks.mock_server import MockFreeConvert  # noqa: E402
+
+# Job shapes of the examples: 01/02/05 (convert), 04 (upload) and 06 (complex).
+WORKFLOWS = {
+    "convert": lambda index: {
+        "myImport1": {"operation": "import/url", "url": "https://cdn.freeconvert.com/logo_theme.svg", "filename": f"logo{index}.svg"},
+        "myConvert1": {"operation": "convert", "input": "myImport1", "output_format": "jpg", "options": {"background": "#FFFFFF"}},
+        "myExport1": {"operation": "export/url", "input": "myConvert1", "filename": f"my-converted-file{index}.jpg"},
+    },
+    "upload": lambda index: {
+        "myUpload1": {"operation": "import/upload"},
+        "myConvert1": {"operation": "convert", "input": "myUpload1", "output_format": "mp3"},
+        "myExport1": {"operation": "export/url", "input": "myConvert1", "filename": f"my-converted-file{index}.mp3"},
+    },
+    "complex": lambda index: {
+        "fcWebpage": {"operation": "import/webpage", "url": "https://www.freeconvert.com"},
+        "webpageScreenshot": {"operation": "convert", "input": "fcWebpage", "output_format": "png"},
+        "diceImage": {"operation": "import/url", "url": "https://upload.wikimedia.org/dice.png"},
+        "treeImage": {"operation": "import/url", "url": "https://upload.wikimedia.org/tree.jpg"},
+        "mergedPdf": {"operation": "merge", "input": ["webpageScreenshot", "diceImage", "treeImage"], "output_format": "pdf"},
+        "thumbnail": {"operation": "convert", "input": "diceImage", "output_format": "jpg"},
+        "thumbnailExport": {"operation": "export/url", "input": "thumbnail", "filename": "Thumbnail.jpg"},
+        "finalExport": {"operation": "export/url", "input": ["thumbnailExport", "mergedPdf"], "archive_multiple_files": True, "filename": f"FinalPackage{index}.zip"},
+    },
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_workflow(base_url, server, args, mode):
+    metrics = Metrics() if args.metrics else None
+    uploads = UploadTransport(limit_per_host=args.upload_connections)
+    freeconvert = FreeConvertClient("benchmark", base_url=f"{base_url}/v1", max_concurrency=args.concurrency, metrics=metrics,
+                                    upload_transport=uploads)
+    poller = JobPoller(freeconvert, initial_interval=args.poll_interval, max_requests_per_second=args.poll_rate)
+    notifications = NotificationHub("benchmark", url=base_url, client=freeconvert, metrics=metrics)
+    upload_body = b"\0" * args.upload_size
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failed = 0
+    requests_before = server.requests if server is not None else None
+
+    async def one(index):
+        nonlocal failed
+        async with slots:
+            started = time.monotonic()
+            job = await freeconvert.create_job(WORKFLOWS[args.workflow](index))
+            if mode == "websocket":
+                waiter = await notifications.watch_job(job["id"])
+            for task in job["tasks"]:
+                if task["operation"] == "import/upload":
+                    await freeconvert.upload(task["result"]["form"], upload_body, filename="upload.bin")
+            if mode == "websocket":
+                await waiter
+                status = "failed" if waiter.event == "job_failed" else "completed"
+            else:
+                status = (await poller.wait_for_job(job["id"]))["status"]
+            latencies.append(time.monotonic() - started)
+            if status != "completed":
+                failed += 1
+
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(one(index) for index in range(args.jobs)))
+    finally:
+        await poller.close()
+        await notifications.close()
+        await freeconvert.close()
+        await uploads.close()
+    elapsed = time.monotonic() - started
+
+    report = {
+        "workflow": args.workflow,
+        "mode": mode,
+        "jobs": args.jobs,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "jobs_per_sec": round(args.jobs / elapsed, 1),
+        "p50_seconds": round(percentile(latencies, 0.50), 3),
+        "p99_seconds": round(percentile(latencies, 0.99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    if requests_before is not None:
+        report["requests_per_job"] = round((server.requests - requests_before) / args.jobs, 2)
+    upload_requests = sum(host["requests"] for host in uploads.stats.values())
+    if upload_requests:
+        report["upload_reuse"] = round(sum(host["reused"] for host in uploads.stats.values()) / upload_requests, 3)
+    if metrics is not None:
+        print(f"# {args.workflow} / {mode}")
+        print(metrics.render())
+    return report
+
+
+async def main(args):
+    server = None
+    base_url = args.server
+    if base_url is None:
+        server = MockFreeConvert(delay=args.delay, failure_rate=args.failure_rate)
+        base_url = await server.start()
+
+    modes = ["polling", "websocket"] if args.mode == "both" else [args.mode]
+    reports = []
+    try:
+        for mode in modes:
+            reports.append(await run_workflow(base_url, server, args, mode))
+    finally:
+        if server is not None:
+            await server.stop()
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    columns = list(reports[0])
+    print(" ".join(f"{column:>16}" for column in columns))
+    for report in reports:
+        print(" ".join(f"{str(report.get(column, '')):>16}" for column in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the FreeConvert client against a local mock API.")
+    parser.add_argument("--workflow", choices=sorted(WORKFLOWS), default="convert")
+    parser.add_argument("--mode", choices=["polling", "websocket", "both"], default="both")
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.1, help="mock server base seconds per task")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="mock server probability of a task failing")
+    parser.add_argument("--upload-connections", type=int, default=16, help="keep-alive connections per upload host")
+    parser.add_argument("--upload-size", type=int, default=256 * 1024, help="bytes per upload for the upload workflow")
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--poll-rate", type=float, default=500, help="max status reads per second")
+    parser.add_argument("--server", help="use an already running mock server (e.g. http://127.0.0.1:8080) instead of an in-process one")
+    parser.add_argument("--metrics", action="store_true", help="also print the client's OpenMetrics output for each run")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# What a cold worker typically imports, from the cheapest to the most complete.
+SCENARIOS = {
+    "package": "import freeconvert",
+    "polling": "from freeconvert import FreeConvertClient, JobPoller",
+    "notifications": "from freeconvert import FreeConvertClient, NotificationHub",
+    "everything": "from freeconvert import *",
+}
+
+# Modules that must not be loaded by each scenario's import alone.
+FORBIDDEN = {
+    "package": ("aiohttp", "socketio"),
+    "polling": ("socketio", "freeconvert.uploads", "freeconvert.downloads"),
+    "notifications": ("socketio",),
+    "everything": ("socketio",),
+}
+
+# Runs in a fresh interpreter: time the import, then report peak RSS and loaded modules.
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+print(json.dumps({{"ms": elapsed * 1000, "rss_mb": peak, "modules": sorted(sys.modules)}}))
+"""
+
+
+def probe(statement):
+    python_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [python_path, env.get("PYTHONPATH")]))
+    output = subprocess.run([sys.executable, "-c", _PROBE.format(statement=statement)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def measure(name, runs):
+    samples = [probe(SCENARIOS[name]) for _ in range(runs)]
+    times = sorted(sample["ms"] for sample in samples)
+    modules = set(samples[-1]["modules"])
+    return {
+        "scenario": name,
+        "median_ms": round(times[len(times) // 2], 1),
+        "max_ms": round(times[-1], 1),
+        "rss_mb": round(max(sample["rss_mb"] for sample in samples), 1),
+        "modules": len(modules),
+        "unexpected": [module for module in FORBIDDEN[name] if module in modules],
+    }
+
+
+def main(args):
+    budgets = {"polling": (args.max_import_ms, args.max_rss_mb)}
+    reports = [measure(name, args.runs) for name in args.scenarios]
+    over = []
+    for report in reports:
+        max_ms, max_rss = budgets.get(report["scenario"], (None, None))
+        if report["unexpected"]:
+            over.append(f"{report['scenario']}: imported {', '.join(report['unexpected'])}")
+        if max_ms is not None and report["median_ms"] > max_ms:
+            over.append(f"{report['scenario']}: import took {report['median_ms']} ms (budget {max_ms} ms)")
+        if max_rss is not None and report["rss_mb"] > max_rss:
+            over.append(f"{report['scenario']}: peak RSS {report['rss_mb']} MB (budget {max_rss} MB)")
+
+    if args.json:
+        print(json.dumps({"reports": reports, "over_budget": over}, indent=2))
+    else:
+        columns = ["scenario", "median_ms", "max_ms", "rss_mb", "modules"]
+        print(" ".join(f"{column:>14}" for column in columns))
+        for report in reports:
+            print(" ".join(f"{str(report[column]):>14}" for column in columns))
+        for problem in over:
+            print(f"OVER BUDGET {problem}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and memory of the freeconvert package.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario")
+    parser.add_argument("--max-import-ms", type=float, default=150, help="budget for the polling scenario's median import time")
+    parser.add_argument("--max-rss-mb", type=float, default=40, help="budget for the polling scenario's peak RSS")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+import importlib
+
+# Public names and the submodule defining each. Submodules are imported on first
+# access, so e.g. a process that only polls never loads socket.io or the upload code.
+_EXPORTS = {
+    "BulkItem": "bulk",
+    "build_bulk_job": "bulk",
+    "bulk_upload": "bulk",
+    "CacheEntry": "cache",
+    "ResultCache": "cache",
+    "cached_convert": "cache",
+    "DEFAULT_BASE_URL": "client",
+    "FreeConvertClient": "client",
+    "FreeConvertError": "client",
+    "Coalescer": "coalesce",
+    "ConversionRequest": "coalesce",
+    "build_chains": "coalesce",
+    "DownloadProgress": "downloads",
+    "download_file": "downloads",
+    "download_exports": "exports",
+    "handle_exports": "exports",
+    "JobGraph": "graph",
+    "JobGraphError": "graph",
+    "JobJournal": "journal",
+    "JournalEntry": "journal",
+    "journaled_job": "journal",
+    "KeyLane": "keypool",
+    "KeyPool": "keypool",
+    "Metrics": "metrics",
+    "Span": "metrics",
+    "Job": "models",
+    "Result": "models",
+    "Task": "models",
+    "NOTIFICATION_URL": "notifications",
+    "NotificationHub": "notifications",
+    "Subscription": "notifications",
+    "TERMINAL_STATUSES": "polling",
+    "JobPoller": "polling",
+    "PreflightError": "preflight",
+    "PreflightResult": "preflight",
+    "preflight_job": "preflight",
+    "preflight_requests": "preflight",
+    "sniff": "preflight",
+    "RateGovernor": "ratelimit",
+    "TokenBucket": "ratelimit",
+    "RetryOutcome": "retry",
+    "RetryPlan": "retry",
+    "RetryPolicy": "retry",
+    "plan_retry": "retry",
+    "run_with_retries": "retry",
+    "DeadlineExceeded": "scheduler",
+    "SubmissionScheduler": "scheduler",
+    "JobTemplate": "templates",
+    "HostStats": "transport",
+    "UploadTransport": "transport",
+    "MultipartStream": "uploads",
+    "UploadProgress": "uploads",
+    "upload_file": "uploads",
+    "UploadPool": "warmpool",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
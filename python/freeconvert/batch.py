@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+from .client import DEFAULT_BASE_URL, FreeConvertClient
+from .coalesce import ConversionRequest, build_chains
+from .polling import JobPoller
+from .preflight import preflight_requests
+
+# Stops a pipeline stage's workers.
+_DONE = object()
+
+
+class BatchItem(ConversionRequest):
+    # One source of a batch run, as read from the manifest, and what happened to it.
+    __slots__ = ("destination", "job_id", "status", "url", "path", "error", "upload_done")
+
+    def __init__(self, source, output_format, options=None, filename=None, destination=None):
+        super().__init__(source, output_format, options, filename)
+        # Local path to download the result to, when downloading.
+        self.destination = destination
+        self.job_id = None
+        self.status = "pending"
+        self.url = None
+        self.path = None
+        self.error = None
+        self.upload_done = None
+
+    def fail(self, error):
+        self.status = "failed"
+        self.error = str(error)
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "output_format": self.output_format,
+            "status": self.status,
+            "job_id": self.job_id,
+            "url": self.url,
+            "path": self.path,
+            "error": self.error,
+        }
+
+
+def _claim(destination, taken):
+    # `destination`, or with -1, -2, ... before its extension when another item already writes there.
+    base, extension = os.path.splitext(destination)
+    candidate, index = destination, 0
+    while os.path.normcase(os.path.normpath(candidate)) in taken:
+        index += 1
+        candidate = f"{base}-{index}{extension}"
+    taken.add(os.path.normcase(os.path.normpath(candidate)))
+    return candidate
+
+
+def scan_directory(directory, output_format, options=None, output_dir=None, extensions=None):
+    # Every file under `directory` (optionally only `extensions`), mirrored under `output_dir`.
+    taken = set()
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if extensions and os.path.splitext(name)[1].lstrip(".").lower() not in extensions:
+                continue
+            path = os.path.join(root, name)
+            destination = None
+            if output_dir is not None:
+                relative = os.path.splitext(os.path.relpath(path, directory))[0]
+                # e.g. report.pdf and report.docx would both become report.<output_format>.
+                destination = _claim(os.path.join(output_dir, f"{relative}.{output_format}"), taken)
+            yield BatchItem(path, output_format, options, destination=destination)
+
+
+def read_manifest(path, output_format=None, options=None, output_dir=None):
+    #
+    # CSV (with a header row) or JSONL rows of `source`, `output_format` and
+    # `options` (a JSON object; a JSON string in CSV). `output_format` and
+    # `options` default to the given values; an optional `destination` column
+    # overrides where the result is downloaded. Otherwise results are named
+    # after their source, with a -1, -2, ... suffix when names collide.
+    #
+    taken = set()
+    with open(path, newline="") as file:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in file if line.strip())
+        else:
+            rows = csv.DictReader(file)
+        for row in rows:
+            row_options = row.get("options") or options
+            if isinstance(row_options, str):
+                row_options = json.loads(row_options)
+            row_format = row.get("output_format") or output_format
+            if not row_format:
+                raise ValueError(f"{path}: no output_format for {row['source']}")
+            destination = row.get("destination")
+            if destination is not None:
+                taken.add(os.path.normcase(os.path.normpath(destination)))
+            elif output_dir is not None:
+                stem = os.path.splitext(os.path.basename(row["source"].split("?")[0]))[0]
+                destination = _claim(os.path.join(output_dir, f"{stem}.{row_format}"), taken)
+            yield BatchItem(row["source"], row_format, row_options, row.get("filename"), destination)
+
+
+class Progress:
+    # Live counters of a batch run, printed as one status line.
+    def __init__(self, total, stream=sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.uploaded = 0
+        self.jobs = 0
+        self.started_at = time.monotonic()
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started_at
+        return self.done / elapsed if elapsed else 0.0
+
+    @property
+    def eta(self):
+        rate = self.rate
+        return (self.total - self.done) / rate if rate else None
+
+    def line(self):
+        eta = self.eta
+        eta = f"{int(eta // 60)}m{int(eta % 60):02d}s" if eta is not None else "?"
+        return (f"{self.done}/{self.total} files ({self.failed} failed), {self.jobs} jobs, "
+                f"{self.uploaded} uploaded, {self.rate:.1f} files/s, ETA {eta}")
+
+    def show(self, final=False):
+        if self.stream is not None:
+            self.stream.write(f"\r{self.line()}" + ("\n" if final else ""))
+            self.stream.flush()
+
+
+async def run_batch(client, poller, items, results=None, batch_size=50, upload_workers=16, download_workers=8,
+                    max_jobs_in_flight=200, queue_size=1000, progress=None, preflight=False):
+    #
+    # Convert `items` (BatchItems) as a pipeline of overlapping stages: job
+    # creation (`batch_size` chains per job), uploads of local sources, waiting
+    # through `poller`, and downloads of results that have a `destination`.
+    # Bounded queues and `max_jobs_in_flight` keep each stage from running ahead
+    # of the next one, so memory and open jobs stay flat however many items
+    # there are. Each finished item is written to `results` (a text file) as a
+    # JSON line. With `preflight`, each source's first KB is checked before its
+    # job is created (see preflight_requests): wrong input formats are fixed,
+    # and items that can't convert to their output format fail without using
+    # any quota. Returns the items.
+    #
+    items = list(items)
+    progress = progress or Progress(len(items), stream=None)
+    uploads = asyncio.Queue(queue_size)
+    downloads = asyncio.Queue(queue_size)
+    in_flight = asyncio.Semaphore(max_jobs_in_flight)
+    waiters = set()
+
+    def finish(item):
+        if item.status != "failed":
+            item.status = "completed"
+        progress.done += 1
+        progress.failed += item.status == "failed"
+        if results is not None:
+            results.write(json.dumps(item.to_dict()) + "\n")
+
+    async def wait(job, batch):
+        try:
+            uploaded = [item.upload_done for item in batch if item.upload_done is not None]
+            if uploaded:
+                await asyncio.gather(*uploaded)
+            # A chain whose upload failed never finishes, and neither does the job then:
+            # the other chains wait for their own export tasks instead.
+            live = [item for item in batch if item.status != "failed"]
+            exports = await poller.wait_for_tasks(job, [item.export_task for item in live],
+                                                  whole_job=len(live) == len(batch)) if live else {}
+        finally:
+            in_flight.release()
+
+        for item in batch:
+            export = exports.get(item.export_task)
+            if item.status != "failed" and isinstance(export, Exception):
+                item.fail(export)
+            elif item.status != "failed" and export is not None:
+                if export["status"] == "completed":
+                    item.url = export["result"]["url"]
+                else:
+                    item.fail(f"job {job['id']} {export['status']}: {(export.get('result') or {}).get('msg', '')}".strip())
+            if item.status != "failed" and item.destination is not None:
+                await downloads.put(item)
+            else:
+                finish(item)
+
+    async def submit():
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            if preflight:
+                checked = await preflight_requests(client.session, batch)
+                for item, result in zip(batch, checked):
+                    if not result.ok:
+                        item.fail(f"preflight: {result.problem}")
+                        finish(item)
+                batch = [item for item, result in zip(batch, checked) if result.ok]
+                if not batch:
+                    continue
+            # Backpressure: don't create more jobs than the waiters and downloads can take.
+            await in_flight.acquire()
+            try:
+                job = await client.create_job(build_chains(batch))
+            except Exception as e:
+                in_flight.release()
+                for item in batch:
+                    item.fail(e)
+                    finish(item)
+                continue
+            progress.jobs += 1
+            forms = {task["name"]: task["result"]["form"] for task in job["tasks"] if task["operation"] == "import/upload"}
+            for item in batch:
+                item.job_id = job["id"]
+                if item.import_task in forms:
+                    item.upload_done = loop.create_future()
+                    await uploads.put((item, forms[item.import_task]))
+            waiter = asyncio.ensure_future(wait(job, batch))
+            waiters.add(waiter)
+            waiter.add_done_callback(waiters.discard)
+
+    async def upload_worker():
+        while True:
+            entry = await uploads.get()
+            if entry is _DONE:
+                return
+            item, form = entry
+            try:
+                await client.upload(form, item.source)
+                progress.uploaded += 1
+            except Exception as e:
+                item.fail(e)
+            item.upload_done.set_result(None)
+
+    async def download_worker():
+        while True:
+            item = await downloads.get()
+            if item is _DONE:
+                return
+            try:
+                os.makedirs(os.path.dirname(item.destination) or ".", exist_ok=True)
+                await client.download(item.url, item.destination)
+                item.path = item.destination
+            except Exception as e:
+                item.fail(e)
+            finish(item)
+
+    async def report():
+        while True:
+            await asyncio.sleep(1)
+            progress.show()
+
+    uploaders = [asyncio.ensure_future(upload_worker()) for _ in range(upload_workers)]
+    downloaders = [asyncio.ensure_future(download_worker()) for _ in range(download_workers)]
+    reporter = asyncio.ensure_future(report())
+    try:
+        await submit()
+        for _ in uploaders:
+            await uploads.put(_DONE)
+        await asyncio.gather(*uploaders)
+        while waiters:
+            await asyncio.gather(*list(waiters))
+        for _ in downloaders:
+            await downloads.put(_DONE)
+        await asyncio.gather(*downloaders)
+    finally:
+        reporter.cancel()
+        for worker in uploaders + downloaders + list(waiters):
+            worker.cancel()
+    progress.show(final=True)
+    return items
+
+
+async def _main(args):
+    options = json.loads(args.options) if args.options else None
+    if os.path.isdir(args.source):
+        if not args.output_format:
+            raise SystemExit("--output-format is required when converting a directory")
+        extensions = {extension.lstrip(".").lower() for extension in args.extensions.split(",")} if args.extensions else None
+        items = scan_directory(args.source, args.output_format, options, args.output_dir, extensions)
+    else:
+        items = read_manifest(args.source, args.output_format, options, args.output_dir)
+    items = list(items)
+
+    freeconvert = FreeConvertClient(args.api_key, base_url=args.base_url, max_concurrency=args.concurrency)
+    poller = JobPoller(freeconvert, max_requests_per_second=args.poll_rate, timeout=args.timeout)
+    results = open(args.results, "w") if args.results != "-" else sys.stdout
+    progress = Progress(len(items))
+    try:
+        await run_batch(freeconvert, poller, items, results, batch_size=args.batch_size,
+                        upload_workers=args.upload_workers, download_workers=args.download_workers,
+                        max_jobs_in_flight=args.max_jobs, progress=progress, preflight=not args.no_preflight)
+    finally:
+        if results is not sys.stdout:
+            results.close()
+        await poller.close()
+        await freeconvert.close()
+    return 1 if progress.failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert a directory tree or a CSV/JSONL manifest of files and URLs with the FreeConvert API.")
+    parser.add_argument("source", help="directory to convert, or a manifest (.csv or .jsonl) of source, output_format, options")
+    parser.add_argument("-f", "--output-format", help="output format for directories and manifest rows without one")
+    parser.add_argument("--options", help="convert options as a JSON object, e.g. '{\"video_codec\": \"h264\"}'")
+    parser.add_argument("-o", "--output-dir", help="download results here (otherwise only their URLs are recorded)")
+    parser.add_argument("--extensions", help="comma-separated input extensions to pick from a directory")
+    parser.add_argument("--results", default="results.jsonl", help="results manifest to write, '-' for stdout")
+    parser.add_argument("--api-key", default=os.environ.get("FREECONVERT_API_KEY"), help="defaults to $FREECONVERT_API_KEY")
+    parser.add_argument("--base-url", default=os.environ.get("FREECONVERT_BASE_URL", DEFAULT_BASE_URL))
+    parser.add_argument("--batch-size", type=int, default=50, help="files per job")
+    parser.add_argument("--upload-workers", type=int, default=16)
+    parser.add_argument("--download-workers", type=int, default=8)
+    parser.add_argument("--max-jobs", type=int, default=200, help="jobs created but not yet finished")
+    parser.add_argument("--concurrency", type=int, default=100, help="API requests in flight")
+    parser.add_argument("--no-preflight", action="store_true", help="don't check sources' formats before submitting")
+    parser.add_argument("--poll-rate", type=float, default=20, help="max status reads per second")
+    parser.add_argument("--timeout", type=float, default=3600, help="seconds to wait for each job")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or $FREECONVERT_API_KEY)")
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
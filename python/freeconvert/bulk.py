@@ -0,0 +1,172 @@
+import asyncio
+import os
+
+
+class BulkItem:
+    # One source file of a bulk upload and everything that happened to it.
+    __slots__ = ("path", "job_id", "upload_task", "convert_task", "export_task", "upload", "result", "error")
+
+    def __init__(self, path):
+        self.path = path
+        self.job_id = None
+        self.upload_task = None
+        self.convert_task = None
+        self.export_task = None
+        # UploadProgress of the finished upload.
+        self.upload = None
+        # The export task document, once the job has finished (only when waiting with a poller).
+        self.result = None
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"<BulkItem {self.path!r} job={self.job_id} error={self.error!r}>"
+
+
+def build_bulk_job(paths, output_format, options=None):
+    #
+    # The upload_example2 shape (import/upload -> convert -> export/url), widened to
+    # one chain per file inside a single job. Returns the `tasks` payload and the
+    # BulkItems with their task names.
+    #
+    tasks = {}
+    items = []
+    for index, path in enumerate(paths, 1):
+        item = BulkItem(path)
+        item.upload_task = f"upload{index}"
+        item.convert_task = f"convert{index}"
+        item.export_task = f"export{index}"
+
+        convert = {
+            "operation": "convert",
+            "input": item.upload_task,
+            "output_format": output_format,
+        }
+        if options:
+            convert["options"] = options
+        stem = os.path.splitext(os.path.basename(path))[0]
+
+        tasks[item.upload_task] = {"operation": "import/upload"}
+        tasks[item.convert_task] = convert
+        tasks[item.export_task] = {
+            "operation": "export/url",
+            "input": item.convert_task,
+            "filename": f"{stem}.{output_format}",
+        }
+        items.append(item)
+    return tasks, items
+
+
+async def _batches(paths, batch_size):
+    batch = []
+    if hasattr(paths, "__aiter__"):
+        async for path in paths:
+            batch.append(path)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    else:
+        for path in paths:
+            batch.append(path)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def bulk_upload(client, paths, output_format, options=None, workers=8, batch_size=50, poller=None):
+    #
+    # Upload and convert many local files.
+    #
+    # `paths` may be a list or any (async) iterable. Every `batch_size` paths become
+    # one /process/jobs request holding all their upload, convert and export tasks,
+    # and the files are then pushed through at most `workers` concurrent uploads.
+    # Yields a BulkItem per file as soon as its upload finishes, or, when a
+    # JobPoller is given, once its export task has finished and `item.result` is
+    # set. A failed upload only fails its own file.
+    #
+    #   async for item in bulk_upload(freeconvert, paths, "mp3", workers=16):
+    #       print(item.path, item.job_id, item.error)
+    #
+    slots = asyncio.Semaphore(workers)
+    finished = asyncio.Queue()
+    running = set()
+    submitted = 0
+    feed_done = object()
+
+    async def transfer(item, form, chains):
+        try:
+            item.upload = await client.upload(form, item.path)
+        except Exception as e:
+            item.error = e
+        finally:
+            slots.release()
+
+        if poller is not None:
+            # The last upload of a batch starts the wait for every chain whose upload worked.
+            chains["left"] -= 1
+            if chains["left"] == 0:
+                uploaded = [other for other in chains["items"] if other.error is None]
+                chains["waiting"].set_result(asyncio.ensure_future(poller.wait_for_tasks(
+                    chains["job"], [other.export_task for other in uploaded], whole_job=len(uploaded) == len(chains["items"]),
+                )))
+            if item.error is None:
+                exports = await (await chains["waiting"])
+                export = exports[item.export_task]
+                if isinstance(export, Exception):
+                    item.error = export
+                else:
+                    item.result = export
+                    if export["status"] != "completed":
+                        item.error = RuntimeError(f"Task {item.export_task} of job {item.job_id} {export['status']}")
+        finished.put_nowait(item)
+
+    async def feed():
+        nonlocal submitted
+        try:
+            async for batch in _batches(paths, batch_size):
+                tasks, items = build_bulk_job(batch, output_format, options)
+                try:
+                    job = await client.create_job(tasks)
+                except Exception as e:
+                    submitted += len(items)
+                    for item in items:
+                        item.error = e
+                        finished.put_nowait(item)
+                    continue
+
+                forms = {task["name"]: task["result"]["form"] for task in job["tasks"] if task["operation"] == "import/upload"}
+                chains = {"job": job, "items": items, "left": len(items),
+                         "waiting": asyncio.get_running_loop().create_future()}
+                for item in items:
+                    item.job_id = job["id"]
+                    # Backpressure: don't create more jobs than the upload workers can keep up with.
+                    await slots.acquire()
+                    upload = asyncio.ensure_future(transfer(item, forms[item.upload_task], chains))
+                    submitted += 1
+                    running.add(upload)
+                    upload.add_done_callback(running.discard)
+        finally:
+            finished.put_nowait(feed_done)
+
+    feeder = asyncio.ensure_future(feed())
+    try:
+        total = None
+        delivered = 0
+        while total is None or delivered < total:
+            item = await finished.get()
+            if item is feed_done:
+                total = submitted
+                continue
+            delivered += 1
+            yield item
+        # Surface errors from iterating `paths`.
+        await feeder
+    finally:
+        feeder.cancel()
+        for upload in list(running):
+            upload.cancel()
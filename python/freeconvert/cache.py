@@ -0,0 +1,302 @@
+import asyncio
+import collections
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from .client import FreeConvertError
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# The index log is rewritten once it has this many lines and twice as many as there are entries.
+COMPACT_MIN_LINES = 1000
+
+
+def expiry_timestamp(value):
+    # Accepts epoch seconds or an ISO-8601 string such as a task's "expiresAt".
+    if value is None or isinstance(value, (int, float)):
+        return value
+    parsed = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+class CacheEntry:
+    __slots__ = ("key", "url", "expires_at", "path", "size", "created_at")
+
+    def __init__(self, key, url=None, expires_at=None, path=None, size=0, created_at=None):
+        self.key = key
+        # Export URL of the converted file, valid until `expires_at` (epoch seconds).
+        self.url = url
+        self.expires_at = expires_at
+        # Local copy of the converted file, when its bytes were stored.
+        self.path = path
+        self.size = size
+        self.created_at = created_at if created_at is not None else time.time()
+
+    @property
+    def expired(self):
+        return self.path is None and self.expires_at is not None and self.expires_at <= time.time()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"<CacheEntry {self.key[:12]} url={self.url!r} path={self.path!r}>"
+
+
+class ResultCache:
+    #
+    # Content-addressed cache of conversion results, stored under `directory`.
+    #
+    # Keys hash the input (file content for local files and bytes, the URL for
+    # remote inputs), the operation and its canonicalized options, so the same
+    # conversion of the same input always maps to the same entry. An entry holds
+    # the export URL (dropped once it expires) and/or a local copy of the result.
+    # Entries are evicted least-recently-used first once `max_entries` or
+    # `max_bytes` of stored files is exceeded, or after `ttl` seconds.
+    # Changes are appended to `index.jsonl`, which is compacted from time to
+    # time, so storing a result doesn't rewrite the whole index.
+    #
+    #   cache = ResultCache(".freeconvert-cache")
+    #   url = await cached_convert(cache, freeconvert, poller, "https://...", "jpg")
+    #
+    def __init__(self, directory, max_bytes=1024 ** 3, max_entries=10000, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._log_lines = 0
+        os.makedirs(os.path.join(directory, "files"), exist_ok=True)
+        self._index_path = os.path.join(directory, "index.jsonl")
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stored_bytes(self):
+        return self._bytes
+
+    @property
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    @staticmethod
+    def key(source, operation="convert", **params):
+        #
+        # e.g. key("logo.svg", "convert", output_format="jpg", options={"background": "#FFFFFF"})
+        # Local files are hashed in full, so run this off the event loop for large files.
+        #
+        digest = hashlib.sha256()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            digest.update(b"bytes:")
+            digest.update(source)
+        elif isinstance(source, str) and source.startswith(("http://", "https://")):
+            digest.update(b"url:" + source.encode())
+        else:
+            digest.update(b"file:")
+            with open(source, "rb") as file:
+                for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        canonical = json.dumps({"operation": operation, **params}, sort_keys=True, separators=(",", ":"), default=str)
+        digest.update(b"\0" + canonical.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and (entry.expired or self._stale(entry)):
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._append({"touch": key})
+        self.hits += 1
+        return entry
+
+    def put_url(self, key, url, expires_at=None):
+        # `expires_at`: epoch seconds or the ISO "expiresAt" of the export task/job.
+        entry = self._entries.get(key) or CacheEntry(key)
+        entry.url = url
+        entry.expires_at = expiry_timestamp(expires_at)
+        return self._store(entry)
+
+    def put_file(self, key, source, url=None, expires_at=None):
+        # Keep a local copy of the result: `source` is a path (copied) or bytes.
+        path = os.path.join(self.directory, "files", key)
+        with tempfile.NamedTemporaryFile(dir=os.path.join(self.directory, "files"), delete=False) as file:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                file.write(source)
+            else:
+                with open(source, "rb") as original:
+                    shutil.copyfileobj(original, file, HASH_CHUNK_SIZE)
+        os.replace(file.name, path)
+
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._bytes -= previous.size
+        entry = previous or CacheEntry(key)
+        entry.path = path
+        entry.size = os.path.getsize(path)
+        if url is not None:
+            entry.url = url
+            entry.expires_at = expiry_timestamp(expires_at)
+        self._bytes += entry.size
+        return self._store(entry)
+
+    def discard(self, key):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        for key in list(self._entries):
+            self._remove(key, log=False)
+        self._compact()
+
+    def _stale(self, entry):
+        return self.ttl is not None and entry.created_at + self.ttl <= time.time()
+
+    def _store(self, entry):
+        self._entries[entry.key] = entry
+        self._entries.move_to_end(entry.key)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            if oldest == entry.key and len(self._entries) == 1:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+        self._append({"put": entry.to_dict()})
+        return entry
+
+    def _remove(self, key, log=True):
+        entry = self._entries.pop(key)
+        if entry.path is not None:
+            self._bytes -= entry.size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        if log:
+            self._append({"remove": key})
+
+    def _load(self):
+        # Replays the index log: "put" records store or replace an entry, "touch" marks one used, "remove" drops it.
+        try:
+            file = open(self._index_path)
+        except OSError:
+            return
+        fields = set(CacheEntry.__slots__)
+        entries = self._entries
+        with file:
+            for line in file:
+                self._log_lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash.
+                    continue
+                if "put" in record:
+                    # Fields this version doesn't know about are ignored.
+                    values = {name: value for name, value in record["put"].items() if name in fields}
+                    if "key" in values:
+                        entries[values["key"]] = CacheEntry(**values)
+                        entries.move_to_end(values["key"])
+                elif record.get("touch") in entries:
+                    entries.move_to_end(record["touch"])
+                elif "remove" in record:
+                    entries.pop(record["remove"], None)
+        for key, entry in list(entries.items()):
+            if entry.path is not None:
+                if os.path.exists(entry.path):
+                    self._bytes += entry.size
+                else:
+                    del entries[key]
+        if self._log_lines > max(COMPACT_MIN_LINES, 2 * len(entries)):
+            self._compact()
+
+    def _append(self, record):
+        with open(self._index_path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+        self._log_lines += 1
+        if self._log_lines > max(COMPACT_MIN_LINES, 2 * len(self._entries)):
+            self._compact()
+
+    def _compact(self):
+        # Rewrite the log as one "put" per entry, in LRU order (oldest first).
+        temporary = f"{self._index_path}.tmp"
+        with open(temporary, "w") as file:
+            for entry in self._entries.values():
+                file.write(json.dumps({"put": entry.to_dict()}) + "\n")
+        os.replace(temporary, self._index_path)
+        self._log_lines = len(self._entries)
+
+
+async def cached_convert(cache, client, poller, source, output_format, options=None, download=False):
+    #
+    # Convert `source` (a URL or local file path) with import -> convert -> export/url,
+    # unless the same conversion is already cached. Returns the CacheEntry; with
+    # `download=True` the result's bytes are also kept in the cache (`entry.path`),
+    # fetched from the cached export URL when there is one.
+    #
+    loop = asyncio.get_running_loop()
+    key = await loop.run_in_executor(None, lambda: cache.key(source, "convert", output_format=output_format, options=options or {}))
+    entry = cache.get(key)
+    if entry is not None:
+        if entry.path is not None or not download:
+            return entry
+        try:
+            return await _keep_file(cache, client, key, entry.url, entry.expires_at)
+        except FreeConvertError as e:
+            # The export is gone before its expiry; convert again.
+            if e.status not in (403, 404, 410):
+                raise
+            cache.discard(key)
+
+    convert = {"operation": "convert", "input": "import", "output_format": output_format}
+    if options:
+        convert["options"] = options
+    remote = isinstance(source, str) and source.startswith(("http://", "https://"))
+    job = await client.create_job({
+        "import": {"operation": "import/url", "url": source} if remote else {"operation": "import/upload"},
+        "convert": convert,
+        "export": {"operation": "export/url", "input": "convert"},
+    })
+    if not remote:
+        upload_task = next(task for task in job["tasks"] if task["name"] == "import")
+        await client.upload(upload_task["result"]["form"], source)
+
+    job = await poller.wait_for_job(job["id"])
+    if job["status"] != "completed":
+        raise RuntimeError(f"Job {job['id']} {job['status']}")
+    export_task = next(task for task in job["tasks"] if task["name"] == "export")
+    url = export_task["result"]["url"]
+    expires_at = export_task.get("expiresAt") or job.get("expiresAt")
+
+    if not download:
+        return cache.put_url(key, url, expires_at)
+    return await _keep_file(cache, client, key, url, expires_at)
+
+
+async def _keep_file(cache, client, key, url, expires_at):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "result")
+        await client.download(url, path)
+        return cache.put_file(key, path, url, expires_at)
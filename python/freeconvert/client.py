@@ -0,0 +1,193 @@
+import asyncio
+import time
+import aiohttp
+
+from .models import Job, Task, dumps, loads
+from .ratelimit import UPLOADS, classify
+
+# Read more at FreeConvert API reference docs: https://www.freeconvert.com/api/v1/
+DEFAULT_BASE_URL = "https://api.freeconvert.com/v1"
+
+
+class FreeConvertError(Exception):
+    # Raised for any non-2xx response from the FreeConvert API.
+    def __init__(self, status, message, payload=None):
+        super().__init__(f"[{status}] {message}")
+        self.status = status
+        self.message = message
+        self.payload = payload
+
+
+class FreeConvertClient:
+    #
+    # Asyncio client for the FreeConvert REST API.
+    #
+    # All calls share one pooled aiohttp session, so thousands of coroutines can
+    # submit jobs concurrently from a single event loop. `max_concurrency` bounds
+    # the number of requests in flight and `max_connections` the number of open
+    # sockets in the pool (defaults to `max_concurrency`). An optional, shareable
+    # RateGovernor paces requests per endpoint class and retries throttled calls,
+    # and an optional Metrics records every call and the lifecycle of created jobs.
+    # Uploads go through an UploadTransport, with keep-alive pools per storage
+    # host; pass `upload_transport` to share one between clients.
+    #
+    #   async with FreeConvertClient(api_key) as freeconvert:
+    #       job = await freeconvert.create_job({...})
+    #
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, max_concurrency=100, max_connections=None, timeout=60,
+                 governor=None, metrics=None, upload_transport=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections or max_concurrency
+        self.timeout = timeout
+        self.governor = governor
+        self.metrics = metrics
+        self._session = None
+        self._semaphore = None
+        self._upload_transport = upload_transport
+        # Only a transport created here is closed with the client.
+        self._owns_upload_transport = upload_transport is None
+
+    @property
+    def headers(self):
+        return {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    @property
+    def session(self):
+        # The underlying pooled session, created on first use inside the running loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    @property
+    def uploads(self):
+        # The UploadTransport used by `upload`, created on first use.
+        if self._upload_transport is None:
+            from .transport import UploadTransport
+            self._upload_transport = UploadTransport()
+        return self._upload_transport
+
+    async def open(self):
+        self.session
+        return self
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._owns_upload_transport and self._upload_transport is not None:
+            await self._upload_transport.close()
+            self._upload_transport = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def request(self, method, path, json=None, body=None):
+        # `body` is an already encoded JSON request body, used instead of `json`.
+        session = self.session
+        governor = self.governor
+        metrics = self.metrics
+        endpoint = classify(method, path)
+        if body is None and json is not None:
+            body = dumps(json)
+        attempt = 0
+        while True:
+            if governor is not None:
+                await governor.acquire(endpoint)
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter()
+                    async with session.request(method, f"{self.base_url}{path}", data=body, headers=self.headers) as response:
+                        raw = await response.read()
+                        try:
+                            payload = loads(raw) if raw else None
+                        except ValueError:
+                            payload = None
+                        if metrics is not None:
+                            metrics.record_request(method, path, response.status, time.perf_counter() - started,
+                                                   len(body) if body else 0, len(raw))
+                        if governor is not None:
+                            governor.observe(endpoint, response.status, response.headers)
+                        if response.status < 400:
+                            return payload
+                        message = payload.get("message", response.reason) if isinstance(payload, dict) else response.reason
+                        error = FreeConvertError(response.status, message, payload)
+                        delay = governor.retry_delay(method, response.status, response.headers, attempt) if governor else None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = governor.retry_delay(method, None, None, attempt) if governor else None
+                if delay is None:
+                    raise
+            else:
+                if delay is None:
+                    raise error
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def create_task(self, operation, **params):
+        # e.g. create_task("import/url", url="...", filename="logo.svg")
+        task = await self.request("POST", f"/process/{operation}", json=params)
+        if self.metrics is not None:
+            self.metrics.task_created(task)
+        return task
+
+    async def create_job(self, tasks, **params):
+        #
+        # `tasks` is a `tasks` dict, a JobGraph, which is validated locally first,
+        # or the complete request body already encoded, e.g. by JobTemplate.render.
+        #
+        if isinstance(tasks, (bytes, bytearray)):
+            if params:
+                raise TypeError("job parameters must be part of a pre-encoded request body")
+            job = await self.request("POST", "/process/jobs", body=tasks)
+        else:
+            if hasattr(tasks, "to_tasks"):
+                tasks = tasks.validate().to_tasks()
+            job = await self.request("POST", "/process/jobs", json={"tasks": tasks, **params})
+        if self.metrics is not None:
+            self.metrics.job_created(job)
+        return job
+
+    async def get_task(self, task_id, model=False):
+        # With `model`, returns a Task (see models) instead of the task document.
+        task = await self.request("GET", f"/process/tasks/{task_id}")
+        if self.metrics is not None:
+            self.metrics.document("task", task)
+        return Task.from_dict(task) if model else task
+
+    async def get_job(self, job_id, model=False):
+        # With `model`, returns a Job (see models) instead of the job document.
+        job = await self.request("GET", f"/process/jobs/{job_id}")
+        if self.metrics is not None:
+            self.metrics.document("job", job)
+        return Job.from_dict(job) if model else job
+
+    async def upload(self, form, source, filename=None, progress=None):
+        # Stream `source` to an import/upload task's `result.form`, see uploads.upload_file.
+        from .uploads import upload_file
+        if self.governor is not None:
+            await self.governor.acquire(UPLOADS)
+        upload = await upload_file(self.uploads.session_for(form["url"]), form, source, filename=filename, progress=progress)
+        if self.metrics is not None:
+            self.metrics.record_transfer("upload", upload.elapsed, upload.bytes_sent)
+        return upload
+
+    async def download(self, url, path, connections=4, progress=None):
+        # Fetch an export/url result to `path`, in parallel ranges when possible, see downloads.download_file.
+        from .downloads import download_file
+        download = await download_file(self.session, url, path, connections=connections, progress=progress)
+        if self.metrics is not None:
+            self.metrics.record_transfer("download", download.elapsed, download.bytes_received)
+        return download
@@ -0,0 +1,196 @@
+import asyncio
+import os
+
+
+class ConversionRequest:
+    # One caller's conversion, waiting to be sent as a chain of a coalesced job.
+    __slots__ = ("source", "output_format", "options", "filename", "future", "input_format",
+                 "import_task", "convert_task", "export_task")
+
+    def __init__(self, source, output_format, options=None, filename=None, future=None):
+        self.source = source
+        self.output_format = output_format
+        self.options = options
+        self.filename = filename
+        self.future = future
+        # Sent as the convert task's `input_format` when set, e.g. by preflight_requests.
+        self.input_format = None
+        self.import_task = None
+        self.convert_task = None
+        self.export_task = None
+
+    @property
+    def remote(self):
+        return isinstance(self.source, str) and self.source.startswith(("http://", "https://"))
+
+    def __repr__(self):
+        return f"<ConversionRequest {self.source!r} -> {self.output_format}>"
+
+
+def build_chains(requests):
+    #
+    # One import -> convert -> export/url chain per request inside a single job.
+    # Task names are numbered per job (import1, convert1, export1, ...) and stored
+    # on the requests. Returns the `tasks` payload.
+    #
+    tasks = {}
+    for index, request in enumerate(requests, 1):
+        request.import_task = f"import{index}"
+        request.convert_task = f"convert{index}"
+        request.export_task = f"export{index}"
+
+        if request.remote:
+            tasks[request.import_task] = {"operation": "import/url", "url": request.source}
+        else:
+            tasks[request.import_task] = {"operation": "import/upload"}
+        convert = {
+            "operation": "convert",
+            "input": request.import_task,
+            "output_format": request.output_format,
+        }
+        if request.input_format:
+            convert["input_format"] = request.input_format
+        if request.options:
+            convert["options"] = request.options
+        export = {"operation": "export/url", "input": request.convert_task}
+        filename = request.filename
+        if filename is None and not request.remote and isinstance(request.source, str):
+            filename = f"{os.path.splitext(os.path.basename(request.source))[0]}.{request.output_format}"
+        if filename is not None:
+            export["filename"] = filename
+
+        tasks[request.convert_task] = convert
+        tasks[request.export_task] = export
+    return tasks
+
+
+class Coalescer:
+    #
+    # Micro-batches single conversions into shared jobs.
+    #
+    # Each `convert()` call is buffered for up to `window` seconds, or until
+    # `max_chains` calls are waiting, and the batch is then sent as one
+    # /process/jobs request with an independent import -> convert -> export/url
+    # chain per call. Sources are URLs (import/url) or local files and bytes
+    # (import/upload, uploaded right after the job is created). Every caller gets
+    # back its own chain's export task: once it has finished when a JobPoller is
+    # given, or as created otherwise. A failed chain, including a failed upload,
+    # only fails its own caller.
+    #
+    #   coalescer = Coalescer(freeconvert, poller, window=0.05)
+    #   export = await coalescer.convert("https://.../logo.svg", "jpg")
+    #   print(export["result"]["url"])
+    #
+    def __init__(self, client, poller=None, window=0.05, max_chains=50):
+        self.client = client
+        self.poller = poller
+        self.window = window
+        self.max_chains = max_chains
+        self.jobs = 0
+        self.chains = 0
+        self._pending = []
+        self._timer = None
+        self._running = set()
+
+    async def convert(self, source, output_format, options=None, filename=None):
+        return await self.submit(source, output_format, options, filename)
+
+    def submit(self, source, output_format, options=None, filename=None):
+        # Queue a conversion and return the future of its export task.
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(ConversionRequest(source, output_format, options, filename, future))
+        if len(self._pending) >= self.max_chains:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        # Send everything buffered so far, without waiting for the window to end.
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.max_chains]
+            del self._pending[:self.max_chains]
+            runner = asyncio.ensure_future(self._run(batch))
+            self._running.add(runner)
+            runner.add_done_callback(self._running.discard)
+
+    async def close(self):
+        # Send the remaining buffer and wait for every in-flight batch.
+        self.flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _run(self, batch):
+        tasks = build_chains(batch)
+        try:
+            job = await self.client.create_job(tasks)
+        except Exception as e:
+            for request in batch:
+                _settle(request.future, error=e)
+            return
+        self.jobs += 1
+        self.chains += len(batch)
+
+        by_name = {task["name"]: task for task in job["tasks"]}
+        uploads = [request for request in batch if not request.remote]
+        failed = set()
+        if uploads:
+            results = await asyncio.gather(
+                *(self.client.upload(by_name[request.import_task]["result"]["form"], request.source) for request in uploads),
+                return_exceptions=True,
+            )
+            for request, result in zip(uploads, results):
+                if isinstance(result, BaseException):
+                    failed.add(request)
+                    _settle(request.future, error=result)
+
+        if self.poller is None:
+            for request in batch:
+                _settle(request.future, by_name[request.export_task])
+            return
+
+        # A chain whose upload failed never finishes, and neither does its job: the
+        # other chains then wait for their own export tasks (see JobPoller.wait_for_tasks).
+        live = [request for request in batch if request not in failed]
+        if not live:
+            return
+        whole_job = not failed
+        if whole_job:
+            # The job document has every task, so the first failed task of a chain can be reported.
+            names = [name for request in live for name in (request.import_task, request.convert_task, request.export_task)]
+        else:
+            names = [request.export_task for request in live]
+        tasks = await self.poller.wait_for_tasks(job, names, whole_job)
+        for request in live:
+            export = tasks[request.export_task]
+            if isinstance(export, Exception):
+                _settle(request.future, error=export)
+                continue
+            if export["status"] == "completed":
+                _settle(request.future, export)
+                continue
+            for name in (request.import_task, request.convert_task, request.export_task):
+                task = tasks.get(name)
+                if task is not None and task["status"] != "completed":
+                    message = (task.get("result") or {}).get("msg") or task["status"]
+                    _settle(request.future, error=RuntimeError(f"Task {name} of job {job['id']} {task['status']}: {message}"))
+                    break
+
+
+def _settle(future, result=None, error=None):
+    # Callers may have given up (cancelled) on their future already.
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import aiohttp
+
+from .client import FreeConvertError
+
+CHUNK_SIZE = 256 * 1024
+
+# Export files larger than this are split into ranges of this size.
+PART_SIZE = 8 * 1024 * 1024
+
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+
+
+class DownloadProgress:
+    __slots__ = ("bytes_received", "total_bytes", "started_at", "elapsed", "ranged", "resumed_bytes")
+
+    def __init__(self, total_bytes=None):
+        self.bytes_received = 0
+        self.total_bytes = total_bytes
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+        # Whether the file was fetched with parallel Range requests.
+        self.ranged = False
+        # Bytes already on disk from an earlier, interrupted attempt.
+        self.resumed_bytes = 0
+
+    @property
+    def throughput(self):
+        return self.bytes_received / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fraction(self):
+        # Retried parts are counted again in bytes_received, hence the cap.
+        return min(1.0, (self.bytes_received + self.resumed_bytes) / self.total_bytes) if self.total_bytes else None
+
+    def __repr__(self):
+        return f"<DownloadProgress {self.bytes_received + self.resumed_bytes}/{self.total_bytes} bytes, {self.throughput / 1e6:.2f} MB/s>"
+
+
+class _ResumeState:
+    #
+    # Sidecar file next to the partial download that records which parts are on
+    # disk, so an interrupted download only refetches what's missing. The ETag
+    # (or Last-Modified) guards against resuming into a different file version.
+    #
+    def __init__(self, path, size, validator, part_size):
+        self.path = path
+        self.size = size
+        self.validator = validator
+        self.part_size = part_size
+        self.done = set()
+
+    @classmethod
+    def load(cls, path, size, validator, part_size):
+        state = cls(path, size, validator, part_size)
+        try:
+            with open(path) as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return state
+        if (saved.get("size"), saved.get("validator"), saved.get("part_size")) == (size, validator, part_size):
+            state.done = set(saved.get("done", ()))
+        return state
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump({"size": self.size, "validator": self.validator, "part_size": self.part_size, "done": sorted(self.done)}, file)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _FileChanged(FreeConvertError):
+    # A part came back whole (200) although If-Range was sent: the file is not the version on disk.
+    def __init__(self):
+        super().__init__(200, "The file changed while it was being downloaded")
+
+
+def _transient(status):
+    return status == 429 or status >= 500
+
+
+async def _get(session, url, headers, retries):
+    # GET that retries connection errors, 429 and 5xx with exponential backoff. The caller closes the response.
+    for attempt in range(retries + 1):
+        try:
+            response = await session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+        else:
+            if not _transient(response.status) or attempt == retries:
+                return response
+            response.release()
+        await asyncio.sleep(2 ** attempt)
+
+
+def _total_from_content_range(value):
+    # "bytes 0-0/12345" -> 12345
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+async def _write_stream(response, file, offset, progress, callback):
+    loop = asyncio.get_running_loop()
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        await loop.run_in_executor(None, _pwrite, file, chunk, offset)
+        offset += len(chunk)
+        progress.bytes_received += len(chunk)
+        progress.elapsed = time.monotonic() - progress.started_at
+        if callback is not None:
+            callback(progress)
+    return offset
+
+
+_seek_lock = threading.Lock()
+
+
+def _pwrite(file, data, offset):
+    if hasattr(os, "pwrite"):
+        os.pwrite(file.fileno(), data, offset)
+    else:
+        with _seek_lock:
+            file.seek(offset)
+            file.write(data)
+
+
+async def _save_single_stream(response, partial_path, path, size, callback):
+    # A `response` of None writes an empty file.
+    stats = DownloadProgress(size)
+    with open(partial_path, "wb") as file:
+        if response is not None:
+            await _write_stream(response, file, 0, stats, callback)
+    os.replace(partial_path, path)
+    stats.elapsed = time.monotonic() - stats.started_at
+    return stats
+
+
+async def download_file(session, url, path, connections=4, part_size=PART_SIZE, retries=3, progress=None):
+    #
+    # Download `url` (e.g. an export/url task's `result.url`) to `path`.
+    #
+    # When the server supports Range requests and the file is larger than one
+    # part, up to `connections` parts are fetched in parallel straight into a
+    # preallocated `<path>.download` file. Finished parts are recorded next to
+    # it, so calling this again after a failure resumes instead of restarting.
+    # Otherwise the file is fetched as a single stream. Throttled (429) and
+    # failed (5xx) requests are retried up to `retries` times. If the file
+    # changes on the server, the download starts over once. Returns DownloadProgress.
+    #
+    try:
+        return await _download(session, url, path, connections, part_size, retries, progress)
+    except _FileChanged:
+        for leftover in (f"{path}.download", f"{path}.download.json"):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+        return await _download(session, url, path, connections, part_size, retries, progress)
+
+
+async def _download(session, url, path, connections, part_size, retries, progress):
+    partial_path = f"{path}.download"
+    state_path = f"{path}.download.json"
+
+    # Probe with a one-byte range: a 206 tells us ranges work and the total size.
+    async with await _get(session, url, {"Range": "bytes=0-0"}, retries) as probe:
+        if probe.status == 416:
+            # Not even byte 0 exists: an empty file ("bytes */0"), or a server that rejects the probe.
+            if _total_from_content_range(probe.headers.get("Content-Range")) == 0:
+                return await _save_single_stream(None, partial_path, path, 0, progress)
+            size = validator = None
+        elif probe.status >= 400:
+            raise FreeConvertError(probe.status, await probe.text())
+        elif probe.status != 206:
+            # No range support: the probe response already carries the whole body.
+            return await _save_single_stream(probe, partial_path, path, probe.content_length, progress)
+        else:
+            size = _total_from_content_range(probe.headers.get("Content-Range"))
+            validator = probe.headers.get("ETag") or probe.headers.get("Last-Modified")
+
+    if size is None:
+        async with await _get(session, url, None, retries) as response:
+            if response.status >= 400:
+                raise FreeConvertError(response.status, await response.text())
+            return await _save_single_stream(response, partial_path, path, response.content_length, progress)
+
+    parts = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+    state = _ResumeState.load(state_path, size, validator, part_size)
+    if not os.path.exists(partial_path) or os.path.getsize(partial_path) != size:
+        state.done.clear()
+        with open(partial_path, "wb") as file:
+            file.truncate(size)
+
+    stats = DownloadProgress(size)
+    stats.ranged = len(parts) > 1
+    stats.resumed_bytes = sum(parts[index][1] - parts[index][0] + 1 for index in state.done if index < len(parts))
+    pending = asyncio.Queue()
+    for index in range(len(parts)):
+        if index not in state.done:
+            pending.put_nowait(index)
+
+    async def worker(file):
+        while not pending.empty():
+            index = pending.get_nowait()
+            start, end = parts[index]
+            headers = {"Range": f"bytes={start}-{end}"}
+            if validator:
+                headers["If-Range"] = validator
+            # One retry loop for both failed requests and bodies cut off mid-stream.
+            for attempt in range(retries + 1):
+                try:
+                    async with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+                        if not _transient(response.status) or attempt == retries:
+                            if response.status == 200 and validator:
+                                raise _FileChanged()
+                            if response.status != 206:
+                                raise FreeConvertError(response.status, f"Expected a partial response for bytes {start}-{end}")
+                            await _write_stream(response, file, start, stats, progress)
+                            break
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if attempt == retries:
+                        raise
+                await asyncio.sleep(2 ** attempt)
+            state.done.add(index)
+            state.save()
+
+    with open(partial_path, "r+b") as file:
+        workers = [asyncio.ensure_future(worker(file)) for _ in range(min(connections, pending.qsize()))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # Stop sibling workers before the file is closed; finished parts stay recorded for resume.
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    os.replace(partial_path, path)
+    state.remove()
+    stats.elapsed = time.monotonic() - stats.started_at
+    return stats
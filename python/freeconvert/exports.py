@@ -0,0 +1,91 @@
+import asyncio
+import os
+import posixpath
+import urllib.parse
+
+
+def is_export(task):
+    return task.get("operation", "").startswith("export/")
+
+
+def _safe_name(name):
+    # The last segment of `name` (either slash), or None when that isn't a plain file name.
+    name = posixpath.basename(name.replace("\\", "/"))
+    # A drive ("C:name") would also make os.path.join drop the directory on Windows.
+    if name in ("", ".", "..") or "\0" in name or (os.name == "nt" and ":" in name):
+        return None
+    return name
+
+
+def export_filename(task):
+    #
+    # The file name of an export task's result: its URL's last path segment, or
+    # the requested `filename`. The URL is decoded before it is split, so an
+    # encoded "/" (%2F) can't point outside the download directory.
+    #
+    url = (task.get("result") or {}).get("url")
+    if url:
+        name = _safe_name(urllib.parse.unquote(urllib.parse.urlparse(url).path))
+        if name:
+            return name
+    return _safe_name((task.get("payload") or {}).get("filename") or "") or f"{task['id']}.bin"
+
+
+async def handle_exports(waiter, job, handler, task_ids=(), on_event=None):
+    #
+    # Run `await handler(task)` for each export task of `job` (the document
+    # returned by create_job) as soon as that task completes, while the rest of
+    # the job is still running.
+    #
+    # With a NotificationHub, `task` is the payload of the export's
+    # task_completed event, so no job or task has to be fetched; `task_ids`
+    # subscribes to more of the job's tasks and `on_event(event, data)` sees
+    # every event. With a JobPoller, each export task is polled on its own.
+    # Returns the job's final payload and the handler's results by task name;
+    # exports that failed have no result.
+    #
+    exports = {task["id"]: task["name"] for task in job["tasks"] if is_export(task)}
+    handled = {}
+
+    def handle(task):
+        handled[exports[task["id"]]] = asyncio.ensure_future(handler(task))
+
+    try:
+        if hasattr(waiter, "subscribe"):
+            subscription = await waiter.watch_job(job["id"], list(dict.fromkeys([*exports, *task_ids])))
+            async for event, data in subscription:
+                if on_event is not None:
+                    on_event(event, data)
+                if event == "task_completed" and data.get("id") in exports and exports[data["id"]] not in handled:
+                    handle(data)
+            final = await subscription
+        else:
+            async def wait_for_export(task_id):
+                task = await waiter.wait_for_task(task_id)
+                if task["status"] == "completed":
+                    handle(task)
+
+            _, final = await asyncio.gather(
+                asyncio.gather(*(wait_for_export(task_id) for task_id in exports)),
+                waiter.wait_for_job(job["id"]),
+            )
+        results = await asyncio.gather(*handled.values())
+    except BaseException:
+        for future in handled.values():
+            future.cancel()
+        raise
+    return final, dict(zip(handled, results))
+
+
+async def download_exports(waiter, client, job, directory=".", connections=4, task_ids=(), on_event=None):
+    #
+    # handle_exports that downloads each export into `directory` as soon as it
+    # is ready. Returns the job's final payload and the local paths by task name.
+    #
+    async def download(task):
+        path = os.path.join(directory, export_filename(task))
+        await client.download(task["result"]["url"], path, connections=connections)
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    return await handle_exports(waiter, job, download, task_ids, on_event)
@@ -0,0 +1,212 @@
+import collections
+import copy
+import re
+
+# IDs of existing tasks (24 hex chars) may be used as `input` without being part of the graph.
+TASK_ID_PATTERN = re.compile(r"^[0-9a-f]{24}$")
+
+# Rough relative cost of each operation, used for the critical path when no durations are given.
+DEFAULT_OPERATION_COSTS = {
+    "import": 1.0,
+    "convert": 3.0,
+    "merge": 3.0,
+    "compress": 3.0,
+    "archive": 2.0,
+    "export": 1.0,
+}
+
+
+class JobGraphError(ValueError):
+    # Raised with every problem found in a job graph, checked before any API call.
+    def __init__(self, problems):
+        super().__init__("Invalid job: " + "; ".join(problems))
+        self.problems = problems
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class JobGraph:
+    #
+    # A /process/jobs `tasks` payload as a graph of named tasks.
+    #
+    # Tasks are added one by one (or loaded from an existing `tasks` dict) and
+    # checked locally: every `input` must name another task in the graph or be an
+    # existing task ID, there must be no cycles, and tasks whose output is never
+    # used are reported (and can be pruned). The graph also reports its critical
+    # path and how many tasks can run in parallel.
+    #
+    #   graph = JobGraph()
+    #   graph.add("myImport1", "import/url", url="https://...")
+    #   graph.add("myConvert1", "convert", input="myImport1", output_format="jpg")
+    #   graph.add("myExport1", "export/url", input="myConvert1")
+    #   job = await freeconvert.create_job(graph)
+    #
+    def __init__(self, tasks=None):
+        self.tasks = {}
+        for name, task in (tasks or {}).items():
+            self.tasks[name] = copy.deepcopy(task)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __contains__(self, name):
+        return name in self.tasks
+
+    def add(self, name, operation, input=None, **params):
+        if name in self.tasks:
+            raise JobGraphError([f"duplicate task name '{name}'"])
+        task = {"operation": operation}
+        if input is not None:
+            task["input"] = input
+        task.update(params)
+        self.tasks[name] = task
+        return name
+
+    def inputs(self, name):
+        # Names of the graph tasks feeding `name` (existing task IDs are left out).
+        return [value for value in _as_list(self.tasks[name].get("input")) if value in self.tasks]
+
+    def consumers(self):
+        consumers = {name: [] for name in self.tasks}
+        for name in self.tasks:
+            for value in self.inputs(name):
+                consumers[value].append(name)
+        return consumers
+
+    def unused(self):
+        # Tasks whose result nothing consumes and that don't export anything.
+        consumers = self.consumers()
+        return [name for name, task in self.tasks.items()
+                if not consumers[name] and not task.get("operation", "").startswith("export/")]
+
+    def problems(self):
+        problems = []
+        for name, task in self.tasks.items():
+            operation = task.get("operation")
+            if not operation:
+                problems.append(f"task '{name}' has no operation")
+                continue
+            values = _as_list(task.get("input"))
+            if operation.startswith("import/"):
+                if values:
+                    problems.append(f"import task '{name}' can't have an input")
+            elif not values:
+                problems.append(f"task '{name}' ({operation}) needs an input")
+            for value in values:
+                if value == name:
+                    problems.append(f"task '{name}' uses itself as input")
+                elif value not in self.tasks and not TASK_ID_PATTERN.match(str(value)):
+                    problems.append(f"task '{name}' has unknown input '{value}'")
+
+        cycle = self._find_cycle()
+        if cycle:
+            problems.append("cycle " + " -> ".join(cycle))
+        for name in self.unused():
+            problems.append(f"task '{name}' is never used")
+        return problems
+
+    def validate(self, allow_unused=False):
+        problems = self.problems()
+        if allow_unused:
+            problems = [problem for problem in problems if not problem.endswith("is never used")]
+        if problems:
+            raise JobGraphError(problems)
+        return self
+
+    def prune(self):
+        # Drop unused tasks, and then any task only they were using. Returns the dropped names.
+        pruned = []
+        unused = self.unused()
+        while unused:
+            for name in unused:
+                del self.tasks[name]
+                pruned.append(name)
+            unused = self.unused()
+        return pruned
+
+    def topological_order(self):
+        order, blocked = self._sort()
+        if blocked:
+            raise JobGraphError(["cycle " + " -> ".join(self._cycle(blocked))])
+        return order
+
+    def levels(self):
+        # Depth of each task: 0 for tasks without graph inputs, else 1 + deepest input.
+        depth = {}
+        for name in self.topological_order():
+            depth[name] = max((depth[value] + 1 for value in self.inputs(name)), default=0)
+        return depth
+
+    def parallel_width(self):
+        # Largest number of tasks that share a depth, i.e. can run at the same time.
+        counts = {}
+        for level in self.levels().values():
+            counts[level] = counts.get(level, 0) + 1
+        return max(counts.values(), default=0)
+
+    def critical_path(self, durations=None):
+        #
+        # Longest chain of dependent tasks, weighted by `durations` (seconds by task
+        # name or operation) or DEFAULT_OPERATION_COSTS. Returns (names, total).
+        #
+        durations = durations or {}
+        finish = {}
+        previous = {}
+        for name in self.topological_order():
+            operation = self.tasks[name]["operation"]
+            cost = durations.get(name, durations.get(operation, DEFAULT_OPERATION_COSTS.get(operation.split("/")[0], 1.0)))
+            start, before = 0.0, None
+            for value in self.inputs(name):
+                if finish[value] > start:
+                    start, before = finish[value], value
+            finish[name] = start + cost
+            previous[name] = before
+
+        if not finish:
+            return [], 0.0
+        name = max(finish, key=finish.get)
+        total = finish[name]
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], total
+
+    def to_tasks(self):
+        # The `tasks` payload for POST /process/jobs.
+        return copy.deepcopy(self.tasks)
+
+    def _find_cycle(self):
+        _, blocked = self._sort()
+        return self._cycle(blocked) if blocked else None
+
+    def _sort(self):
+        # Kahn's algorithm, without recursion so long chains are fine. Also returns the tasks a cycle blocks.
+        consumers = self.consumers()
+        waiting = {name: len(self.inputs(name)) for name in self.tasks}
+        ready = collections.deque(name for name, count in waiting.items() if not count)
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for consumer in consumers[name]:
+                waiting[consumer] -= 1
+                if not waiting[consumer]:
+                    ready.append(consumer)
+        return order, [name for name in self.tasks if waiting[name]]
+
+    def _cycle(self, blocked):
+        # Every blocked task has a blocked input; following them backwards must come round to a cycle.
+        blocked = set(blocked)
+        name = next(name for name in self.tasks if name in blocked)
+        path, seen = [], {}
+        while name not in seen:
+            seen[name] = len(path)
+            path.append(name)
+            name = next(value for value in self.inputs(name) if value in blocked)
+        # The path follows inputs backwards; report the cycle in data-flow order.
+        return (path[seen[name]:] + [name])[::-1]
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .client import FreeConvertError
+from .polling import TERMINAL_STATUSES
+
+# Journal states of a submission.
+PENDING = "pending"
+SUBMITTED = "submitted"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    key TEXT PRIMARY KEY,
+    job_id TEXT,
+    status TEXT NOT NULL,
+    tasks TEXT,
+    results TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_status ON submissions (status, updated_at);
+CREATE INDEX IF NOT EXISTS submissions_job_id ON submissions (job_id);
+"""
+
+
+class JournalEntry:
+    __slots__ = ("key", "job_id", "status", "tasks", "results", "error", "created_at", "updated_at")
+
+    def __init__(self, key, job_id, status, tasks, results, error, created_at, updated_at):
+        self.key = key
+        self.job_id = job_id
+        # PENDING (about to be submitted), SUBMITTED, or the job's terminal status.
+        self.status = status
+        # Task IDs by task name.
+        self.tasks = json.loads(tasks) if tasks else {}
+        # Export URLs by task name.
+        self.results = json.loads(results) if results else {}
+        self.error = error
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATUSES
+
+    def __repr__(self):
+        return f"<JournalEntry {self.key[:12]} {self.status} job={self.job_id}>"
+
+
+class JobJournal:
+    #
+    # Crash-safe record of submitted jobs in an SQLite database (WAL mode).
+    #
+    # Each submission is keyed by the content of what it converts (see `key`).
+    # The key is written before the job is created, and the job ID and task IDs
+    # right after, so a worker that crashes mid-batch can reattach to its
+    # in-flight jobs on restart instead of submitting (and paying for) them again.
+    # Finished jobs keep their status and export URLs, so repeated inputs are
+    # answered from the journal. Lookups by key and by status are indexed.
+    #
+    # The only unrecoverable gap is a crash between the job POST returning and its
+    # ID being written; such entries stay PENDING and are submitted again.
+    # `reattach` and `journaled_job` commit from the default executor, since
+    # every commit waits for the disk with synchronous=FULL.
+    #
+    #   journal = JobJournal("jobs.db")
+    #   await journal.reattach(poller)
+    #   entry = await journaled_job(journal, freeconvert, poller, journal.key(tasks), tasks)
+    #
+    def __init__(self, path, synchronous="FULL"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # FULL also survives power loss; NORMAL only application crashes, but commits faster.
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(tasks, **params):
+        # SHA-256 of the canonical job payload; use ResultCache.key for keys that hash local file contents.
+        if hasattr(tasks, "to_tasks"):
+            tasks = tasks.to_tasks()
+        canonical = json.dumps({"tasks": tasks, **params}, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM submissions")[0][0]
+
+    def get(self, key):
+        rows = self._query("SELECT * FROM submissions WHERE key = ?", (key,))
+        return JournalEntry(*rows[0]) if rows else None
+
+    def by_job(self, job_id):
+        rows = self._query("SELECT * FROM submissions WHERE job_id = ?", (job_id,))
+        return JournalEntry(*rows[0]) if rows else None
+
+    def by_status(self, status, limit=None):
+        # Oldest first.
+        sql = "SELECT * FROM submissions WHERE status = ? ORDER BY updated_at"
+        params = (status,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return [JournalEntry(*row) for row in self._query(sql, params)]
+
+    def in_flight(self):
+        return self.by_status(SUBMITTED)
+
+    def counts(self):
+        return dict(self._query("SELECT status, COUNT(*) FROM submissions GROUP BY status"))
+
+    def begin(self, key):
+        # Record the intent to submit `key`, before the job is created.
+        now = time.time()
+        self._execute(
+            "INSERT INTO submissions (key, status, created_at, updated_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET status = excluded.status, job_id = NULL, error = NULL,"
+            " updated_at = excluded.updated_at",
+            (key, PENDING, now, now),
+        )
+
+    def submitted(self, key, job):
+        # Record the created job (its document as returned by create_job).
+        tasks = {task["name"]: task["id"] for task in job.get("tasks", ())}
+        self._execute(
+            "UPDATE submissions SET job_id = ?, status = ?, tasks = ?, updated_at = ? WHERE key = ?",
+            (job["id"], SUBMITTED, json.dumps(tasks), time.time(), key),
+        )
+
+    def finished(self, key, job):
+        # Record a job's final document: its status, export URLs and error, if any.
+        results = {task["name"]: task["result"]["url"] for task in job.get("tasks", ())
+                   if task["operation"].startswith("export/") and (task.get("result") or {}).get("url")}
+        error = (job.get("result") or {}).get("msg") if job["status"] != "completed" else None
+        self._execute(
+            "UPDATE submissions SET status = ?, results = ?, error = ?, updated_at = ? WHERE key = ?",
+            (job["status"], json.dumps(results), error, time.time(), key),
+        )
+
+    def failed_to_wait(self, key, error, resubmit=False):
+        # Record why waiting for a job failed. Only with `resubmit` (the job is gone) is its ID dropped.
+        if resubmit:
+            self._execute("UPDATE submissions SET status = ?, job_id = NULL, error = ?, updated_at = ? WHERE key = ?",
+                          (PENDING, error, time.time(), key))
+        else:
+            self._execute("UPDATE submissions SET error = ?, updated_at = ? WHERE key = ?", (error, time.time(), key))
+
+    def forget(self, key):
+        self._execute("DELETE FROM submissions WHERE key = ?", (key,))
+
+    async def reattach(self, waiter, on_finished=None):
+        #
+        # Wait for every job that was SUBMITTED but not yet finished when the
+        # journal was last used, through `waiter` (a JobPoller), and record the
+        # results. A job that no longer exists is reset to PENDING, to be
+        # submitted again; on a timeout or any other error the entry stays
+        # SUBMITTED with its job ID and the error. Returns the updated entries.
+        #
+        async def finish(entry):
+            try:
+                job = await waiter.wait_for_job(entry.job_id)
+            except Exception as e:
+                # Only a job that is gone is submitted again; one that timed out may still be running.
+                gone = isinstance(e, FreeConvertError) and e.status in (404, 410)
+                await _in_thread(self.failed_to_wait, entry.key, str(e) or type(e).__name__, gone)
+                return await _in_thread(self.get, entry.key)
+            if job["status"] == "deleted":
+                await _in_thread(self.failed_to_wait, entry.key, f"Job {entry.job_id} was deleted", True)
+                return await _in_thread(self.get, entry.key)
+            await _in_thread(self.finished, entry.key, job)
+            entry = await _in_thread(self.get, entry.key)
+            if on_finished is not None:
+                on_finished(entry)
+            return entry
+
+        return await asyncio.gather(*(finish(entry) for entry in await _in_thread(self.in_flight)))
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            self._db.execute(sql, params)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+
+async def journaled_job(journal, client, waiter, key, tasks, **params):
+    #
+    # Run the job for `key` at most once: finished entries are returned as they
+    # are, in-flight ones are waited for, and anything else is submitted and
+    # journaled. Returns the JournalEntry once the job has finished.
+    #
+    entry = await _in_thread(journal.get, key)
+    if entry is not None and entry.finished:
+        return entry
+    if entry is None or entry.status != SUBMITTED:
+        await _in_thread(journal.begin, key)
+        job = await client.create_job(tasks, **params)
+        await _in_thread(journal.submitted, key, job)
+        job_id = job["id"]
+    else:
+        job_id = entry.job_id
+    job = await waiter.wait_for_job(job_id)
+    await _in_thread(journal.finished, key, job)
+    return await _in_thread(journal.get, key)
+
+
+def _in_thread(function, *args):
+    # SQLite calls block on the disk; run them in the default executor instead of the event loop thread.
+    return asyncio.get_running_loop().run_in_executor(None, function, *args)
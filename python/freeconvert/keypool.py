@@ -0,0 +1,207 @@
+import asyncio
+import collections
+import time
+
+from .client import DEFAULT_BASE_URL, FreeConvertClient, FreeConvertError
+from .notifications import NOTIFICATION_URL, NotificationHub
+from .polling import JobPoller
+from .ratelimit import JOBS, RateGovernor
+
+
+class KeyLane:
+    #
+    # Everything that belongs to one API key: its client (with its own rate
+    # governor), and the poller and notification connection for the jobs created
+    # with it, both created on first use. Jobs can only be read, uploaded to and
+    # subscribed to with the key that created them, so all follow-up calls for a
+    # job go through the lane that created it.
+    #
+    def __init__(self, pool, api_key, client, max_in_flight):
+        self.pool = pool
+        self.api_key = api_key
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.jobs = 0
+        self.failures = 0
+        # Set to the reason once the key is rejected (401/403); the lane is then never used again.
+        self.disabled = None
+        self.cooldown_until = 0.0
+        self._poller = None
+        self._notifications = None
+
+    @property
+    def poller(self):
+        if self._poller is None:
+            self._poller = JobPoller(self.client, **self.pool.poller_options)
+        return self._poller
+
+    @property
+    def notifications(self):
+        # Authenticates with this lane's key, as in 03-realtime-websocket-updates.
+        if self._notifications is None:
+            self._notifications = NotificationHub(self.api_key, url=self.pool.notification_url, client=self.client)
+        return self._notifications
+
+    @property
+    def healthy(self):
+        return self.disabled is None and time.monotonic() >= self.cooldown_until
+
+    @property
+    def load(self):
+        # 0 (idle) to 1 (full): the larger of its share of in-flight jobs and of its spent job-creation budget.
+        concurrency = self.in_flight / self.max_in_flight
+        quota = 1.0 - self.client.governor.headroom(JOBS) if self.client.governor is not None else 0.0
+        return max(concurrency, quota)
+
+    async def create_job(self, tasks, **params):
+        job = await self.client.create_job(tasks, **params)
+        self.jobs += 1
+        self.pool._own(job["id"], self)
+        return job
+
+    async def wait_for_job(self, job_id, timeout=None):
+        return await self.poller.wait_for_job(job_id, timeout)
+
+    async def watch_job(self, job_id, task_ids=()):
+        return await self.notifications.watch_job(job_id, task_ids)
+
+    async def close(self):
+        if self._poller is not None:
+            await self._poller.close()
+        if self._notifications is not None:
+            await self._notifications.close()
+        await self.client.close()
+
+    def __repr__(self):
+        state = f"disabled: {self.disabled}" if self.disabled else ("healthy" if self.healthy else "cooling down")
+        return f"<KeyLane ...{self.api_key[-4:]} {self.in_flight}/{self.max_in_flight} {state}>"
+
+
+class _Lease:
+    def __init__(self, pool):
+        self.pool = pool
+        self.lane = None
+
+    async def __aenter__(self):
+        self.lane = await self.pool.acquire()
+        return self.lane
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.pool.release(self.lane, exc)
+
+
+class KeyPool:
+    #
+    # Spreads jobs over several API keys (accounts).
+    #
+    # Each key gets a KeyLane with its own client and RateGovernor (`limits`),
+    # and may run up to `max_in_flight` jobs at a time. `lease()` hands out the
+    # least-loaded healthy lane, weighing both its in-flight jobs and its
+    # remaining job-creation budget, and waits when every lane is full. Keys
+    # that are rejected (401/403) are disabled; keys that are throttled (429) or
+    # fail `max_failures` times in a row rest for `cooldown` seconds. The lane of
+    # the last `max_tracked_jobs` jobs created is remembered for `lane_for`.
+    #
+    #   pool = KeyPool(["key1", "key2", "key3"], max_in_flight=50)
+    #   async with pool.lease() as lane:
+    #       job = await lane.create_job({...})
+    #       await lane.client.upload(form, path)
+    #       job = await lane.wait_for_job(job["id"])
+    #
+    def __init__(self, api_keys, base_url=DEFAULT_BASE_URL, max_in_flight=50, limits=None,
+                 notification_url=NOTIFICATION_URL, cooldown=30.0, max_failures=3, poller_options=None,
+                 max_tracked_jobs=10000, **client_options):
+        if not api_keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.notification_url = notification_url
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self.poller_options = poller_options or {}
+        self.max_tracked_jobs = max_tracked_jobs
+        self.lanes = [
+            KeyLane(self, api_key, FreeConvertClient(api_key, base_url, governor=RateGovernor(limits), **client_options),
+                    max_in_flight)
+            for api_key in api_keys
+        ]
+        # Job ID -> lane, least recently created or looked up first.
+        self._owners = collections.OrderedDict()
+        self._changed = None
+
+    def __len__(self):
+        return len(self.lanes)
+
+    @property
+    def stats(self):
+        return [{"key": f"...{lane.api_key[-4:]}", "in_flight": lane.in_flight, "jobs": lane.jobs,
+                 "load": round(lane.load, 2), "healthy": lane.healthy, "disabled": lane.disabled}
+                for lane in self.lanes]
+
+    def lease(self):
+        # async context manager around acquire/release.
+        return _Lease(self)
+
+    async def acquire(self):
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        while True:
+            candidates = [lane for lane in self.lanes if lane.healthy and lane.in_flight < lane.max_in_flight]
+            if candidates:
+                lane = min(candidates, key=lambda lane: lane.load)
+                lane.in_flight += 1
+                return lane
+            if all(lane.disabled for lane in self.lanes):
+                raise FreeConvertError(401, "Every API key of the pool was rejected")
+            # Wake up on a release, or when the first cooldown ends.
+            self._changed.clear()
+            resting = [lane.cooldown_until for lane in self.lanes if lane.disabled is None and not lane.healthy]
+            timeout = max(0.0, min(resting) - time.monotonic()) if resting else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, lane, error=None):
+        # Return a lane taken with `acquire`; `error` is the exception its work failed with, if any.
+        lane.in_flight -= 1
+        if isinstance(error, FreeConvertError) and error.status in (401, 403):
+            lane.disabled = str(error)
+        elif isinstance(error, FreeConvertError) and error.status == 429:
+            lane.cooldown_until = time.monotonic() + self.cooldown
+        elif isinstance(error, Exception) and (not isinstance(error, FreeConvertError) or error.status >= 500):
+            lane.failures += 1
+            if lane.failures >= self.max_failures:
+                lane.failures = 0
+                lane.cooldown_until = time.monotonic() + self.cooldown
+        elif error is None:
+            lane.failures = 0
+        if self._changed is not None:
+            self._changed.set()
+
+    def lane_for(self, job_id):
+        #
+        # The lane whose key created `job_id` (through KeyLane.create_job), e.g.
+        # to poll or download it later. KeyError once more than `max_tracked_jobs`
+        # newer jobs have been created or looked up since.
+        #
+        lane = self._owners[job_id]
+        self._owners.move_to_end(job_id)
+        return lane
+
+    def forget(self, job_id):
+        self._owners.pop(job_id, None)
+
+    def _own(self, job_id, lane):
+        self._owners[job_id] = lane
+        self._owners.move_to_end(job_id)
+        while len(self._owners) > self.max_tracked_jobs:
+            self._owners.popitem(last=False)
+
+    async def close(self):
+        await asyncio.gather(*(lane.close() for lane in self.lanes))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,249 @@
+import re
+import time
+
+# Histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DURATION_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# Same as polling.TERMINAL_STATUSES, without importing the HTTP stack.
+_TERMINAL_STATUSES = ("completed", "failed", "canceled", "deleted")
+
+_ID_SEGMENT = re.compile(r"^(/process/(?:jobs|tasks))/[^/]+")
+
+
+def endpoint_name(path):
+    # "/process/jobs/5f2b..." -> "/process/jobs/{id}", so label values stay bounded.
+    return _ID_SEGMENT.sub(r"\1/{id}", path)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th quantile (inf when it is past the last bucket).
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}"
+        yield f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {self.count}"
+        yield f"{name}_sum{_labels(labels)} {self.sum}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+class Span:
+    # Lifecycle of one task or job: created -> started -> finished.
+    __slots__ = ("kind", "id", "name", "operation", "job_id", "created_at", "started_at", "finished_at", "status")
+
+    def __init__(self, kind, id, name=None, operation=None, job_id=None, created_at=None):
+        self.kind = kind
+        self.id = id
+        self.name = name
+        self.operation = operation
+        self.job_id = job_id
+        self.created_at = created_at if created_at is not None else time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.status = None
+
+    @property
+    def queued(self):
+        # Seconds between creation and the task_started event.
+        return self.started_at - self.created_at if self.started_at is not None else None
+
+    @property
+    def running(self):
+        start = self.started_at if self.started_at is not None else self.created_at
+        return self.finished_at - start if self.finished_at is not None else None
+
+    @property
+    def duration(self):
+        return self.finished_at - self.created_at if self.finished_at is not None else None
+
+    def __repr__(self):
+        return f"<Span {self.kind} {self.name or self.id} {self.status} {self.duration}>"
+
+
+class Metrics:
+    #
+    # Counters, histograms and lifecycle spans for the FreeConvert client.
+    #
+    # Pass one instance to FreeConvertClient(metrics=...) and
+    # NotificationHub(metrics=...): every API call records its latency, status and
+    # bytes, jobs created through the client open per-task and per-job spans, and
+    # the task_started/task_completed/task_failed/job_* events close them, as do
+    # terminal job and task documents read through the client (e.g. by a
+    # JobPoller). When no Metrics is given, the hot paths skip instrumentation
+    # entirely.
+    #
+    # `render()` returns the OpenMetrics text exposition. Finished spans are passed
+    # to `on_span`, and exported as OpenTelemetry spans with `tracing=True` (needs
+    # the opentelemetry-api package).
+    #
+    def __init__(self, on_span=None, tracing=False):
+        self.on_span = on_span
+        self._counters = {}
+        self._histograms = {}
+        self._spans = {}
+        self._tracer = None
+        if tracing:
+            from opentelemetry import trace
+            self._tracer = trace.get_tracer("freeconvert")
+
+    @property
+    def open_spans(self):
+        return list(self._spans.values())
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def counter(self, name, **labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, name, **labels):
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    # API calls
+
+    def record_request(self, method, path, status, seconds, bytes_sent=0, bytes_received=0):
+        labels = (("endpoint", endpoint_name(path)), ("method", method))
+        self.inc("freeconvert_requests", labels + (("status", status),))
+        self.observe("freeconvert_request_seconds", labels, seconds)
+        if bytes_sent:
+            self.inc("freeconvert_request_bytes_sent", labels, bytes_sent)
+        if bytes_received:
+            self.inc("freeconvert_request_bytes_received", labels, bytes_received)
+
+    def record_transfer(self, direction, seconds, size):
+        # direction: "upload" or "download" of file bodies.
+        labels = (("direction", direction),)
+        self.inc("freeconvert_transfer_bytes", labels, size)
+        self.observe("freeconvert_transfer_seconds", labels, seconds, DURATION_BUCKETS)
+
+    # Lifecycle spans
+
+    def job_created(self, job):
+        now = time.time()
+        self._spans[("job", job["id"])] = Span("job", job["id"], created_at=now)
+        for task in job.get("tasks", ()):
+            self._spans[("task", task["id"])] = Span(
+                "task", task["id"], task.get("name"), task.get("operation"), job["id"], created_at=now)
+
+    def task_created(self, task):
+        self._spans[("task", task["id"])] = Span("task", task["id"], task.get("name"), task.get("operation"))
+
+    def notification(self, event, data):
+        kind = "task" if event.startswith("task_") else "job"
+        span = self._spans.get((kind, data.get("id")))
+        if span is None:
+            return
+        if event == "task_started":
+            span.started_at = time.time()
+            return
+        span.finished_at = time.time()
+        span.status = "failed" if event.endswith("_failed") else "completed"
+        self.finish(span)
+
+    def document(self, kind, document):
+        # Close the spans of a finished "job" or "task" document (a job's finished tasks too).
+        if not isinstance(document, dict):
+            return
+        if kind == "job":
+            for task in document.get("tasks") or ():
+                self.document("task", task)
+        span = self._spans.get((kind, document.get("id")))
+        if span is None or document.get("status") not in _TERMINAL_STATUSES:
+            return
+        span.finished_at = time.time()
+        span.status = document["status"]
+        self.finish(span)
+
+    def finish(self, span):
+        # Record a span's timings and drop it from the open set.
+        self._spans.pop((span.kind, span.id), None)
+        if span.kind == "task":
+            labels = (("operation", span.operation or "unknown"),)
+            self.inc("freeconvert_tasks", labels + (("status", span.status),))
+            if span.queued is not None:
+                self.observe("freeconvert_task_queued_seconds", labels, span.queued, DURATION_BUCKETS)
+            if span.running is not None:
+                self.observe("freeconvert_task_running_seconds", labels, span.running, DURATION_BUCKETS)
+        else:
+            self.inc("freeconvert_jobs", (("status", span.status),))
+            self.observe("freeconvert_job_seconds", (), span.duration, DURATION_BUCKETS)
+
+        if self.on_span is not None:
+            self.on_span(span)
+        if self._tracer is not None:
+            self._trace(span)
+
+    def _trace(self, span):
+        to_ns = 1_000_000_000
+        otel_span = self._tracer.start_span(
+            f"freeconvert.{span.kind}",
+            start_time=int(span.created_at * to_ns),
+            attributes={key: value for key, value in (
+                ("freeconvert.id", span.id),
+                ("freeconvert.name", span.name),
+                ("freeconvert.operation", span.operation),
+                ("freeconvert.job_id", span.job_id),
+                ("freeconvert.status", span.status),
+            ) if value is not None},
+        )
+        if span.started_at is not None:
+            otel_span.add_event("started", timestamp=int(span.started_at * to_ns))
+        otel_span.end(end_time=int(span.finished_at * to_ns))
+
+    # Exposition
+
+    def render(self):
+        # OpenMetrics text format.
+        lines = []
+        by_name = {}
+        for (name, labels), value in self._counters.items():
+            by_name.setdefault(("counter", name), []).append(f"{name}_total{_labels(labels)} {value}")
+        for (name, labels), histogram in self._histograms.items():
+            by_name.setdefault(("histogram", name), []).extend(histogram.samples(name, labels))
+        for (kind, name), samples in sorted(by_name.items(), key=lambda item: item[0][1]):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
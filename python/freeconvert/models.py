@@ -0,0 +1,229 @@
+import json
+
+# Same as polling.TERMINAL_STATUSES, without importing the HTTP stack.
+_TERMINAL_STATUSES = ("completed", "failed", "canceled", "deleted")
+
+# orjson decodes large job documents several times faster when it is installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+    dumps = orjson.dumps
+else:
+    loads = json.loads
+
+    def dumps(value):
+        return json.dumps(value, separators=(",", ":")).encode()
+
+
+class Result:
+    # A task's or job's `result`: the export URL, the upload form, or the error.
+    __slots__ = ("url", "form", "error_code", "msg", "extra")
+
+    def __init__(self, url=None, form=None, error_code=None, msg=None, extra=None):
+        self.url = url
+        self.form = form
+        self.error_code = error_code
+        self.msg = msg
+        # Any other fields, e.g. an import's file metadata.
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return None
+        data = dict(data)
+        return cls(data.pop("url", None), data.pop("form", None), data.pop("errorCode", None),
+                   data.pop("msg", None), data or None)
+
+    def to_dict(self):
+        data = dict(self.extra or {})
+        for key, value in (("url", self.url), ("form", self.form), ("errorCode", self.error_code), ("msg", self.msg)):
+            if value is not None:
+                data[key] = value
+        return data
+
+    def __repr__(self):
+        if self.error_code is not None:
+            return f"<Result [{self.error_code}] {self.msg}>"
+        return f"<Result {self.url or ('form' if self.form else None)}>"
+
+
+class Task:
+    __slots__ = ("id", "name", "operation", "status", "job_id", "depends_on", "result", "created_at", "expires_at")
+
+    def __init__(self, id, name=None, operation=None, status=None, job_id=None, depends_on=(), result=None,
+                 created_at=None, expires_at=None):
+        self.id = id
+        self.name = name
+        self.operation = operation
+        self.status = status
+        self.job_id = job_id
+        self.depends_on = tuple(depends_on)
+        self.result = result
+        self.created_at = created_at
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["id"], data.get("name"), data.get("operation"), data.get("status"), data.get("job"),
+            data.get("dependsOn") or (), Result.from_dict(data.get("result")),
+            data.get("createdAt"), data.get("expiresAt"),
+        )
+
+    def update(self, data):
+        # Apply a task document or notification payload; only the fields it carries change.
+        if "status" in data:
+            self.status = data["status"]
+        if data.get("result"):
+            self.result = Result.from_dict(data["result"])
+        if "expiresAt" in data:
+            self.expires_at = data["expiresAt"]
+        return self
+
+    @property
+    def url(self):
+        return self.result.url if self.result is not None else None
+
+    @property
+    def form(self):
+        return self.result.form if self.result is not None else None
+
+    @property
+    def finished(self):
+        return self.status in _TERMINAL_STATUSES
+
+    def to_dict(self):
+        data = {"id": self.id, "name": self.name, "operation": self.operation, "status": self.status,
+                "job": self.job_id, "dependsOn": list(self.depends_on)}
+        if self.result is not None:
+            data["result"] = self.result.to_dict()
+        if self.created_at is not None:
+            data["createdAt"] = self.created_at
+        if self.expires_at is not None:
+            data["expiresAt"] = self.expires_at
+        return data
+
+    def __repr__(self):
+        return f"<Task {self.name or self.id} {self.operation} {self.status}>"
+
+
+class Job:
+    #
+    # Compact, slotted view of a job document.
+    #
+    # Tasks are indexed by name and by ID, so `job.task("myExport1")` replaces
+    # `next(t for t in job["tasks"] if t["name"] == "myExport1")`. `apply` takes
+    # task_* and job_* notification payloads and updates just the task or job
+    # they are about, so a tracked job never has to be fetched and parsed again.
+    #
+    #   job = Job.from_dict(await freeconvert.create_job({...}))
+    #   subscription = await notifications.watch_job(job.id, [task.id for task in job])
+    #   async for event, data in subscription:
+    #       job.apply(event, data)
+    #   print(job.task("myExport1").url)
+    #
+    __slots__ = ("id", "status", "tag", "result", "created_at", "expires_at", "tasks", "_by_name", "_by_id")
+
+    def __init__(self, id, status=None, tasks=(), result=None, tag=None, created_at=None, expires_at=None):
+        self.id = id
+        self.status = status
+        self.tag = tag
+        self.result = result
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.tasks = list(tasks)
+        self._by_name = {task.name: task for task in self.tasks if task.name is not None}
+        self._by_id = {task.id: task for task in self.tasks}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["id"], data.get("status"), [Task.from_dict(task) for task in data.get("tasks") or ()],
+            Result.from_dict(data.get("result")), data.get("tag"), data.get("createdAt"), data.get("expiresAt"),
+        )
+
+    @classmethod
+    def from_json(cls, raw):
+        # Decode a job response body (bytes or str) with the fastest available decoder.
+        return cls.from_dict(loads(raw))
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def task(self, name):
+        # Raises KeyError for an unknown task name.
+        return self._by_name[name]
+
+    def task_by_id(self, task_id):
+        return self._by_id[task_id]
+
+    def tasks_by_operation(self, prefix):
+        # e.g. tasks_by_operation("export/")
+        return [task for task in self.tasks if task.operation and task.operation.startswith(prefix)]
+
+    @property
+    def finished(self):
+        return self.status in _TERMINAL_STATUSES
+
+    @property
+    def failed_tasks(self):
+        return [task for task in self.tasks if task.status == "failed"]
+
+    @property
+    def export_urls(self):
+        # Export URLs by task name, of the exports that completed.
+        return {task.name: task.url for task in self.tasks_by_operation("export/") if task.url}
+
+    def apply(self, event, data):
+        # Update from a notification event; returns the Task or Job it changed, or None.
+        if event.startswith("task_"):
+            task = self._by_id.get(data.get("id"))
+            if task is None:
+                return None
+            return task.update(data)
+        if data.get("id") != self.id:
+            return None
+        return self.update(data)
+
+    def update(self, data):
+        # Apply a (possibly partial) job document. Task documents are merged, not replaced.
+        if "status" in data:
+            self.status = data["status"]
+        if data.get("result"):
+            self.result = Result.from_dict(data["result"])
+        if "expiresAt" in data:
+            self.expires_at = data["expiresAt"]
+        for document in data.get("tasks") or ():
+            task = self._by_id.get(document["id"])
+            if task is None:
+                task = Task.from_dict(document)
+                self.tasks.append(task)
+                self._by_id[task.id] = task
+                if task.name is not None:
+                    self._by_name[task.name] = task
+            else:
+                task.update(document)
+        return self
+
+    def to_dict(self):
+        data = {"id": self.id, "status": self.status, "tasks": [task.to_dict() for task in self.tasks]}
+        for key, value in (("tag", self.tag), ("createdAt", self.created_at), ("expiresAt", self.expires_at)):
+            if value is not None:
+                data[key] = value
+        if self.result is not None:
+            data["result"] = self.result.to_dict()
+        return data
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.status} tasks={len(self.tasks)}>"
@@ -0,0 +1,279 @@
+import asyncio
+
+# Read more: https://www.freeconvert.com/api/v1/#freeconvert-com-api-socket
+NOTIFICATION_URL = "https://notification.freeconvert.com"
+
+TASK_EVENTS = ("task_started", "task_completed", "task_failed")
+JOB_EVENTS = ("job_completed", "job_failed")
+
+# Events after which a channel never emits again.
+TERMINAL_EVENTS = ("task_completed", "task_failed", "job_completed", "job_failed")
+
+# REST statuses that settle a job or task, and the event that would have reported them.
+_TASK_STATUS_EVENTS = {"completed": "task_completed", "failed": "task_failed", "canceled": "task_failed", "deleted": "task_failed"}
+_JOB_STATUS_EVENTS = {"completed": "job_completed", "failed": "job_failed", "canceled": "job_failed", "deleted": "job_failed"}
+
+
+def task_channel(task_id):
+    return f"task.{task_id}"
+
+
+def job_channel(job_id):
+    return f"job.{job_id}"
+
+
+class Subscription:
+    #
+    # Events for one job or task, delivered by a NotificationHub.
+    #
+    # Await the subscription for the payload of its terminal event, or iterate it
+    # with `async for event, data in subscription` to see every event as it
+    # arrives. A job subscription may also carry the channels of its tasks; task
+    # events are then yielded too, but only the job's own terminal event ends it.
+    #
+    def __init__(self, hub, channel, extra_channels=()):
+        self.hub = hub
+        self.channel = channel
+        self.channels = {channel, *extra_channels}
+        self.event = None
+        # Events delivered so far, on any of the channels.
+        self.received = 0
+        self.result = asyncio.get_running_loop().create_future()
+        self._events = asyncio.Queue()
+
+    @property
+    def done(self):
+        return self.result.done()
+
+    def __await__(self):
+        return asyncio.shield(self.result).__await__()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done and self._events.empty():
+            raise StopAsyncIteration
+        item = await self._events.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+    async def close(self):
+        await self.hub.release(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _deliver(self, channel, event, data):
+        # Returns the channels this subscription no longer needs.
+        if self.done:
+            return ()
+        self.received += 1
+        self._events.put_nowait((event, data))
+        if event not in TERMINAL_EVENTS:
+            return ()
+        if channel != self.channel:
+            return (channel,)
+        self._finish(event, data)
+        return tuple(self.channels)
+
+    def _finish(self, event, data):
+        self.event = event
+        self.result.set_result(data)
+        self._events.put_nowait(None)
+
+
+class NotificationHub:
+    #
+    # One long-lived socket.io connection to the FreeConvert notification service,
+    # shared by every job and task the process is waiting on.
+    #
+    # The hub keeps a registry of channel -> subscriptions. A channel is subscribed
+    # on the server when its first subscription is added and unsubscribed when the
+    # last one finishes or is closed, and incoming events are routed to the
+    # subscriptions registered for their channel.
+    #
+    # If the connection drops, socket.io reconnects with exponential backoff
+    # (`reconnection_delay` up to `reconnection_delay_max`, randomized). Once back,
+    # every live channel is subscribed again and, when a REST `client` is given,
+    # one pass of GET /process/jobs/{id} (and /process/tasks/{id} for standalone
+    # task channels) settles anything that finished while the hub was offline.
+    # New channels get the same check `subscribe_check_delay` seconds after they
+    # are subscribed, if no event has reached their subscription by then: the
+    # subscribe is fire-and-forget, so a job that finishes before the server has
+    # handled it sends its events to nobody. A closed hub can't be reused.
+    #
+    #   hub = NotificationHub(api_key, client=freeconvert)
+    #   job = await hub.watch_job(job_id)
+    #
+    def __init__(self, api_key, url=NOTIFICATION_URL, transports=("websocket",), client=None,
+                 reconnection_delay=1, reconnection_delay_max=30, metrics=None, subscribe_check_delay=2.0):
+        self.api_key = api_key
+        self.url = url
+        self.transports = list(transports)
+        self.client = client
+        self.reconnection_delay = reconnection_delay
+        self.reconnection_delay_max = reconnection_delay_max
+        self.subscribe_check_delay = subscribe_check_delay
+        # Task and job events close the lifecycle spans of a Metrics instance.
+        self.metrics = metrics
+        self.reconnects = 0
+        self._sio = None
+        self._connect_lock = None
+        self._channels = {}
+        self._was_disconnected = False
+        self._reconciling = None
+        self._checks = set()
+        self._closed = False
+
+    @property
+    def connected(self):
+        return self._sio is not None and self._sio.connected
+
+    @property
+    def channels(self):
+        return list(self._channels)
+
+    async def connect(self):
+        if self._closed:
+            raise RuntimeError("NotificationHub is closed")
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            # While socket.io is reconnecting on its own, new channels are picked up on reconnect.
+            if self.connected or self._was_disconnected:
+                return
+            if self._sio is None:
+                # socket.io is only imported once notifications are actually used.
+                import socketio
+                self._sio = socketio.AsyncClient(
+                    reconnection=True,
+                    reconnection_delay=self.reconnection_delay,
+                    reconnection_delay_max=self.reconnection_delay_max,
+                )
+                self._sio.on("connect", handler=self._on_connect)
+                self._sio.on("disconnect", handler=self._on_disconnect)
+                for event in TASK_EVENTS + JOB_EVENTS:
+                    self._sio.on(event, handler=self._handler(event))
+            await self._sio.connect(self.url, transports=self.transports, auth={"token": f"Bearer {self.api_key}"})
+
+    async def close(self):
+        self._closed = True
+        for subscriptions in list(self._channels.values()):
+            for subscription in list(subscriptions):
+                if not subscription.done:
+                    subscription.result.cancel()
+                    subscription._events.put_nowait(None)
+        self._channels.clear()
+        if self._reconciling is not None:
+            self._reconciling.cancel()
+        for check in list(self._checks):
+            check.cancel()
+        if self._sio is not None and self._sio.connected:
+            await self._sio.disconnect()
+
+    async def watch_task(self, task_id):
+        return await self.subscribe(task_channel(task_id))
+
+    async def watch_job(self, job_id, task_ids=()):
+        # Optionally also receive the events of the job's tasks on the same subscription.
+        return await self.subscribe(job_channel(job_id), [task_channel(task_id) for task_id in task_ids])
+
+    async def subscribe(self, channel, extra_channels=()):
+        await self.connect()
+        subscription = Subscription(self, channel, extra_channels)
+        added = []
+        for name in (channel, *extra_channels):
+            subscribers = self._channels.setdefault(name, set())
+            subscribers.add(subscription)
+            if len(subscribers) == 1:
+                added.append(name)
+                if self.connected:
+                    await self._sio.emit("subscribe", name)
+        if added and self.client is not None and self.subscribe_check_delay is not None:
+            check = asyncio.get_running_loop().create_task(self._check_new(subscription, added))
+            self._checks.add(check)
+            check.add_done_callback(self._checks.discard)
+        return subscription
+
+    async def release(self, subscription, channels=None):
+        for name in list(channels if channels is not None else subscription.channels):
+            subscription.channels.discard(name)
+            subscribers = self._channels.get(name)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[name]
+                if self.connected:
+                    await self._sio.emit("unsubscribe", name)
+
+    async def reconcile(self, channels=None):
+        # Settle live channels (or just `channels`) from the REST API, as if their missed events had arrived.
+        if self.client is None:
+            return
+        channels = list(self._channels) if channels is None else channels
+        job_ids = [name[len("job."):] for name in channels if name.startswith("job.")]
+        task_ids = {name[len("task."):] for name in channels if name.startswith("task.")}
+
+        jobs = await asyncio.gather(*(self.client.get_job(job_id) for job_id in job_ids), return_exceptions=True)
+        for job in jobs:
+            if isinstance(job, Exception):
+                continue
+            for task in job.get("tasks", ()):
+                task_ids.discard(task.get("id"))
+                await self._replay(task_channel(task.get("id")), _TASK_STATUS_EVENTS, task)
+            await self._replay(job_channel(job.get("id")), _JOB_STATUS_EVENTS, job)
+
+        # Task channels that don't belong to any watched job are checked one by one.
+        tasks = await asyncio.gather(*(self.client.get_task(task_id) for task_id in task_ids), return_exceptions=True)
+        for task in tasks:
+            if not isinstance(task, Exception):
+                await self._replay(task_channel(task.get("id")), _TASK_STATUS_EVENTS, task)
+
+    async def _check_new(self, subscription, channels):
+        # An event on any of the subscription's channels shows the server has its subscribes.
+        await asyncio.sleep(self.subscribe_check_delay)
+        live = [name for name in channels if name in self._channels]
+        if live and not subscription.received:
+            await self.reconcile(live)
+
+    async def _replay(self, channel, status_events, document):
+        event = status_events.get(document.get("status"))
+        if event is not None and channel in self._channels:
+            if self.metrics is not None:
+                self.metrics.notification(event, document)
+            await self._dispatch(channel, event, document)
+
+    async def _on_connect(self):
+        if not self._was_disconnected:
+            return
+        self._was_disconnected = False
+        self.reconnects += 1
+        for name in list(self._channels):
+            await self._sio.emit("subscribe", name)
+        # Don't hold up the socket.io event loop while the REST pass runs.
+        self._reconciling = asyncio.get_running_loop().create_task(self.reconcile())
+
+    async def _on_disconnect(self):
+        self._was_disconnected = True
+
+    def _handler(self, event):
+        prefix = "task" if event.startswith("task_") else "job"
+
+        async def handle(data):
+            if self.metrics is not None:
+                self.metrics.notification(event, data)
+            await self._dispatch(f"{prefix}.{data['id']}", event, data)
+
+        return handle
+
+    async def _dispatch(self, channel, event, data):
+        for subscription in list(self._channels.get(channel, ())):
+            finished = subscription._deliver(channel, event, data)
+            if finished:
+                await self.release(subscription, finished)
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import random
+import aiohttp
+
+from .client import FreeConvertError
+from .models import Job, Task
+
+# Jobs and tasks stop changing once they reach one of these statuses.
+TERMINAL_STATUSES = ("completed", "failed", "canceled", "deleted")
+
+
+class _Watch:
+    __slots__ = ("kind", "id", "future", "interval", "deadline", "checks")
+
+    def __init__(self, kind, id, future, interval, deadline):
+        self.kind = kind
+        self.id = id
+        self.future = future
+        self.interval = interval
+        self.deadline = deadline
+        self.checks = 0
+
+
+class JobPoller:
+    #
+    # Tracks any number of jobs and tasks from one scheduler loop.
+    #
+    # Each watched ID gets its own adaptive interval: it is checked quickly at
+    # first (`initial_interval`) and backs off exponentially up to `max_interval`,
+    # with random jitter so that IDs submitted together don't poll in lockstep.
+    # Status reads are issued at most `max_requests_per_second`, however many IDs
+    # are in flight. With `model`, waits resolve with Job and Task objects (see
+    # models) instead of documents; only the final document is converted, so
+    # polls of unfinished jobs cost no more than without.
+    #
+    #   poller = JobPoller(freeconvert)
+    #   job = await poller.wait_for_job(job_id)
+    #
+    def __init__(self, client, initial_interval=0.5, max_interval=30.0, backoff=1.5, jitter=0.2,
+                 max_requests_per_second=20, timeout=None, model=False):
+        self.client = client
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_requests_per_second = max_requests_per_second
+        self.timeout = timeout
+        self.model = model
+        self._watches = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._wakeup = None
+        self._runner = None
+        self._checks = set()
+
+    def __len__(self):
+        return len(self._watches)
+
+    def watch_job(self, job_id, timeout=None):
+        # Returns a future resolved with the final job document (a Job with `model`).
+        return self._watch("job", job_id, timeout)
+
+    def watch_task(self, task_id, timeout=None):
+        # Returns a future resolved with the final task document (a Task with `model`).
+        return self._watch("task", task_id, timeout)
+
+    async def wait_for_job(self, job_id, timeout=None):
+        return await asyncio.shield(self.watch_job(job_id, timeout))
+
+    async def wait_for_task(self, task_id, timeout=None):
+        return await asyncio.shield(self.watch_task(task_id, timeout))
+
+    async def wait_for_tasks(self, job, names, whole_job=True, timeout=None):
+        #
+        # Wait for the tasks `names` of `job` (as returned by create_job) and
+        # return their final documents by name, or the exception a task's wait
+        # failed with. With `whole_job`, the job is polled, one request per check
+        # for all its tasks. A job with a task that will never run (an upload
+        # that failed) never finishes, so pass `whole_job=False` and only the
+        # tasks that can still finish: each is then polled on its own.
+        #
+        if whole_job:
+            try:
+                document = await self.wait_for_job(job["id"], timeout)
+            except Exception as e:
+                return dict.fromkeys(names, e)
+            tasks = {task.name: task for task in document} if self.model else {task["name"]: task for task in document["tasks"]}
+            return {name: tasks[name] for name in names}
+        ids = {task["name"]: task["id"] for task in job["tasks"]}
+        documents = await asyncio.gather(*(self.wait_for_task(ids[name], timeout) for name in names),
+                                         return_exceptions=True)
+        return dict(zip(names, documents))
+
+    def forget(self, kind, id):
+        # Stop tracking an ID; its future is cancelled if still pending.
+        watch = self._watches.pop((kind, id), None)
+        if watch is not None and not watch.future.done():
+            watch.future.cancel()
+
+    async def close(self):
+        if self._runner is not None:
+            self._runner.cancel()
+        for check in list(self._checks):
+            check.cancel()
+        for watch in self._watches.values():
+            if not watch.future.done():
+                watch.future.cancel()
+        self._watches.clear()
+        self._heap.clear()
+        self._runner = None
+
+    def _watch(self, kind, id, timeout):
+        key = (kind, id)
+        watch = self._watches.get(key)
+        # A future cancelled by its caller (e.g. through asyncio.wait_for) is not handed out again.
+        if watch is not None and not watch.future.done():
+            return watch.future
+
+        loop = asyncio.get_running_loop()
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = loop.time() + timeout if timeout is not None else None
+        watch = _Watch(kind, id, loop.create_future(), self.initial_interval, deadline)
+        self._watches[key] = watch
+        self._schedule(watch, loop.time() + self.initial_interval)
+        return watch.future
+
+    def _schedule(self, watch, due):
+        heapq.heappush(self._heap, (due, next(self._counter), watch))
+        if self._runner is None or self._runner.done():
+            # The loop exits whenever the heap drains and is restarted on demand.
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    def _next_interval(self, watch):
+        interval = min(watch.interval * self.backoff, self.max_interval)
+        watch.interval = interval
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        spacing = 1 / self.max_requests_per_second if self.max_requests_per_second else 0
+
+        while self._heap:
+            due, _, watch = self._heap[0]
+            now = loop.time()
+            if due > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            if self._watches.get((watch.kind, watch.id)) is not watch:
+                continue
+            if watch.future.done():
+                del self._watches[(watch.kind, watch.id)]
+                continue
+
+            check = loop.create_task(self._check(watch))
+            self._checks.add(check)
+            check.add_done_callback(self._checks.discard)
+            if spacing:
+                await asyncio.sleep(spacing)
+
+    async def _check(self, watch):
+        loop = asyncio.get_running_loop()
+        watch.checks += 1
+        try:
+            if watch.kind == "job":
+                document = await self.client.get_job(watch.id)
+            else:
+                document = await self.client.get_task(watch.id)
+        except FreeConvertError as e:
+            # A missing or forbidden ID will never resolve, anything else is retried.
+            if e.status in (401, 403, 404):
+                self._settle(watch, exception=e)
+                return
+            document = None
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError):
+            document = None
+
+        if document is not None and document.get("status") in TERMINAL_STATUSES:
+            if self.model:
+                document = Job.from_dict(document) if watch.kind == "job" else Task.from_dict(document)
+            self._settle(watch, result=document)
+        elif watch.deadline is not None and loop.time() >= watch.deadline:
+            self._settle(watch, exception=TimeoutError(f"Poll timeout for {watch.kind} {watch.id}"))
+        else:
+            due = loop.time() + self._next_interval(watch)
+            # The last check happens at the deadline, not up to max_interval past it.
+            self._schedule(watch, due if watch.deadline is None else min(due, watch.deadline))
+
+    def _settle(self, watch, result=None, exception=None):
+        if self._watches.get((watch.kind, watch.id)) is watch:
+            del self._watches[(watch.kind, watch.id)]
+        if watch.future.done():
+            return
+        if exception is not None:
+            watch.future.set_exception(exception)
+        else:
+            watch.future.set_result(result)
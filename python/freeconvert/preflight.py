@@ -0,0 +1,469 @@
+import asyncio
+import os
+import posixpath
+import urllib.parse
+
+# Bytes read from each source; every signature below sits in the first KB.
+HEAD_SIZE = 1024
+
+# Brands of ISO base media ("ftyp") files.
+_FTYP_BRANDS = {
+    b"qt  ": "mov", b"M4A ": "m4a", b"M4B ": "m4a", b"M4V ": "m4v", b"crx ": "cr3",
+    b"heic": "heic", b"heix": "heic", b"hevc": "heic", b"heim": "heic", b"heis": "heic", b"mif1": "heic", b"msf1": "heic",
+}
+
+_MP4_BRANDS = {b"isom", b"iso2", b"iso3", b"iso4", b"iso5", b"iso6", b"mp41", b"mp42", b"avc1", b"dash", b"mmp4",
+               b"MSNV", b"f4v ", b"F4V "}
+
+_PREFIXES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"%PDF-", "pdf"),
+    (b"{\\rtf", "rtf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole"),
+    (b"Rar!\x1a\x07", "rar"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x1f\x8b", "gz"),
+    (b"BZh", "bz2"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"8BPS", "psd"),
+    (b"\x00\x00\x01\x00", "ico"),
+    (b"\x00\x00\x00\x0cjP  ", "jp2"),
+    (b"fLaC", "flac"),
+    (b"ID3", "mp3"),
+    (b"#!AMR", "amr"),
+    (b"FLV\x01", "flv"),
+    (b"0&\xb2u\x8ef\xcf\x11", "wmv"),
+    (b"\x00\x00\x01\xba", "mpg"),
+    (b"\x00\x00\x01\xb3", "mpg"),
+)
+
+_RIFF_TYPES = {b"WEBP": "webp", b"WAVE": "wav", b"AVI ": "avi"}
+
+_OPENDOCUMENT = {
+    b"application/epub+zip": "epub",
+    b"application/vnd.oasis.opendocument.text": "odt",
+    b"application/vnd.oasis.opendocument.spreadsheet": "ods",
+    b"application/vnd.oasis.opendocument.presentation": "odp",
+}
+
+# Names that mean the same format, and formats that share a container, so the
+# signature alone can't tell them apart (an "isom" file may be .mp4, .m4a or .mov).
+_EQUIVALENT = (
+    {"jpg", "jpeg", "jfif", "jpe"},
+    {"tif", "tiff"},
+    {"mp4", "m4v", "m4a", "mov", "3gp", "3g2", "f4v"},
+    {"mkv", "webm", "mka"},
+    {"ogg", "oga", "ogv", "opus"},
+    {"mpg", "mpeg", "vob"},
+    {"heic", "heif"},
+    {"htm", "html"},
+    {"eps", "ps", "ai"},
+    {"pdf", "ai"},
+    {"wmv", "wma", "asf"},
+    {"aac", "m4a"},
+    {"zip", "docx", "xlsx", "pptx", "odt", "ods", "odp", "epub", "cbz", "jar", "apk"},
+    {"ole", "doc", "xls", "ppt", "msg"},
+    {"gz", "tgz"},
+)
+# Detections that only name a container shared by many formats; they never fix or reject anything.
+CONTAINERS = {"tiff", "gz", "zip", "ole", "isobmff"}
+
+# Formats sniff() recognizes on their own, and other names for them.
+_SPECIFIC = {
+    "png", "jpg", "gif", "webp", "bmp", "ico", "psd", "jp2", "heic", "avif", "cr3", "svg", "pdf", "rtf", "html",
+    "docx", "xlsx", "pptx", "odt", "ods", "odp", "epub", "mobi", "mp3", "aac", "wav", "flac", "ogg", "opus", "aiff",
+    "amr", "mp4", "m4a", "m4v", "mov", "3gp", "3g2", "mkv", "webm", "avi", "flv", "wmv", "mpg", "ts",
+    "rar", "7z", "xz", "bz2", "tar",
+}
+_ALIASES = {"jpeg": "jpg", "jfif": "jpg", "jpe": "jpg", "htm": "html", "mpeg": "mpg", "heif": "heic"}
+
+_SAME = {}
+for _group in _EQUIVALENT:
+    for _name in _group:
+        _SAME.setdefault(_name, set()).update(_group)
+
+# A coarse, local view of what FreeConvert can convert: the kind of each format,
+# and the kinds of output each kind of input converts to. Formats that aren't
+# listed are never rejected; the API stays the final judge.
+FORMAT_KINDS = {}
+for _kind, _names in (
+    ("image", "png jpg jpeg jfif gif webp bmp tif tiff ico heic heif avif psd jp2 cr3 tga"),
+    ("vector", "svg eps ps ai emf wmf"),
+    ("document", "pdf doc docx xls xlsx ppt pptx odt ods odp rtf txt html htm md csv"),
+    ("ebook", "epub mobi azw3 fb2 cbz"),
+    ("audio", "mp3 wav flac ogg oga opus m4a aac wma aiff amr"),
+    ("video", "mp4 m4v mov mkv webm avi flv wmv mpg mpeg 3gp 3g2 ts ogv"),
+    ("archive", "zip rar 7z gz tgz bz2 xz tar"),
+):
+    FORMAT_KINDS.update(dict.fromkeys(_names.split(), _kind))
+
+CONVERSIONS = {
+    "image": {"image", "vector", "document"},
+    "vector": {"image", "vector", "document"},
+    "document": {"document", "image", "ebook"},
+    "ebook": {"ebook", "document", "image"},
+    "audio": {"audio", "video"},
+    "video": {"video", "audio", "image"},
+    "archive": {"archive"},
+}
+
+# Single formats that convert beyond their kind, e.g. animated GIFs to video.
+EXTRA_CONVERSIONS = {"gif": {"video"}, "webp": {"video"}}
+
+
+def _ftyp(head):
+    size = int.from_bytes(head[:4], "big")
+    brands = head[8:max(16, min(size, len(head)))]
+    if b"avif" in brands or b"avis" in brands:
+        return "avif"
+    brand = head[8:12]
+    if brand.startswith(b"3g2"):
+        return "3g2"
+    if brand.startswith(b"3gp"):
+        return "3gp"
+    if brand in _MP4_BRANDS:
+        return "mp4"
+    # Other known brands, or just "some ISO base media file".
+    return _FTYP_BRANDS.get(brand, "isobmff")
+
+
+def _zip(head):
+    # A zip's first entry tells ODF and EPUB files apart; OOXML parts often show up in the first KB.
+    if head[30:38] == b"mimetype":
+        for mime, name in _OPENDOCUMENT.items():
+            if head[38:38 + len(mime)] == mime:
+                return name
+    for marker, name in ((b"word/", "docx"), (b"xl/", "xlsx"), (b"ppt/", "pptx")):
+        if marker in head:
+            return name
+    return "zip"
+
+
+def _text(head):
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith((b"<svg", b"<?xml", b"<!doctype svg")) and b"<svg" in text:
+        return "svg"
+    if text.startswith((b"<!doctype html", b"<html")):
+        return "html"
+    return None
+
+
+# MPEG audio bitrates (kbit/s) by (MPEG-1?, layer) and bitrate index, and sample rates by version bits.
+_MPEG_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _frame_length(head, offset=0):
+    #
+    # Length of the MPEG audio or ADTS frame whose header starts at `offset`:
+    # None unless the sync is there and no field holds a reserved value, 0 for
+    # a valid free-format MPEG frame, whose length isn't in its header.
+    #
+    if len(head) < offset + 4 or head[offset] != 0xFF or head[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version, layer = head[offset + 1] >> 3 & 3, head[offset + 1] >> 1 & 3
+    if layer == 0:
+        # ADTS (AAC): 12 sync bits, and a 13-bit frame length.
+        if version & 2 == 0 or len(head) < offset + 6 or head[offset + 2] >> 2 & 0xF > 12:
+            return None
+        length = (head[offset + 3] & 3) << 11 | head[offset + 4] << 3 | head[offset + 5] >> 5
+        return length if length >= 7 else None
+    bitrate, rate = head[offset + 2] >> 4, head[offset + 2] >> 2 & 3
+    if version == 1 or bitrate == 15 or rate == 3:
+        return None
+    layer = 4 - layer
+    kbps = _MPEG_BITRATES[(version == 3, layer)][bitrate]
+    sample_rate = _MPEG_SAMPLE_RATES[version][rate]
+    padding = head[offset + 2] >> 1 & 1
+    if layer == 1:
+        return (12000 * kbps // sample_rate + padding) * 4
+    return (144000 if layer == 2 or version == 3 else 72000) * kbps // sample_rate + padding
+
+
+def _mpeg_audio(head):
+    # "mp3" or "aac" for a head that starts with a valid frame, followed by another one if the head reaches that far.
+    length = _frame_length(head)
+    if length is None:
+        return None
+    if length and len(head) >= length + 4 and _frame_length(head, length) is None:
+        return None
+    return "aac" if head[1] & 0x06 == 0 else "mp3"
+
+
+def sniff(head):
+    #
+    # The format of a file from its first bytes (HEAD_SIZE is enough), by magic
+    # numbers. Containers shared by several formats come back as the container
+    # (see CONTAINERS) unless the head says more. None when unknown.
+    #
+    for prefix, name in _PREFIXES:
+        if head.startswith(prefix):
+            return name
+    if head[4:8] == b"ftyp":
+        return _ftyp(head)
+    if head.startswith(b"RIFF"):
+        return _RIFF_TYPES.get(head[8:12])
+    if head.startswith(b"PK\x03\x04"):
+        return _zip(head)
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm" if b"webm" in head[:64] else "mkv"
+    if head.startswith(b"OggS"):
+        return "opus" if b"OpusHead" in head[:64] else "ogg"
+    if head.startswith(b"FORM") and head[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if head[60:68] == b"BOOKMOBI":
+        return "mobi"
+    if head.startswith(b"BM") and head[6:10] == b"\x00\x00\x00\x00":
+        return "bmp"
+    if head[257:262] == b"ustar":
+        return "tar"
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        # A UTF-16 byte order mark (FF FE would also pass for an MPEG frame sync).
+        return _text(head.decode("utf-16", "ignore").encode("utf-8"))
+    if head[:1] == b"\xff":
+        # MPEG audio frame sync: layers I-III are MP3, layer bits 00 is an AAC ADTS stream.
+        return _mpeg_audio(head)
+    if len(head) > 188 and head[0] == 0x47 and head[188] == 0x47:
+        return "ts"
+    return _text(head)
+
+
+def same_format(a, b):
+    a, b = a.lower(), b.lower()
+    return a == b or b in _SAME.get(a, ())
+
+
+def can_convert(input_format, output_format):
+    # False only when the local table knows both formats and has no such conversion.
+    input_format, output_format = input_format.lower(), output_format.lower()
+    source, target = FORMAT_KINDS.get(input_format), FORMAT_KINDS.get(output_format)
+    if source is None or target is None:
+        return True
+    return target in CONVERSIONS.get(source, ()) or target in EXTRA_CONVERSIONS.get(input_format, ())
+
+
+def extension(name):
+    # "logo.svg" or "https://cdn.example.com/logo.svg?x=1" -> "svg"
+    if not isinstance(name, str):
+        return None
+    if name.startswith(("http://", "https://")):
+        name = urllib.parse.unquote(urllib.parse.urlsplit(name).path)
+    _, ext = posixpath.splitext(name.replace("\\", "/"))
+    return ext[1:].lower() or None
+
+
+def read_head(source, size=HEAD_SIZE):
+    # The first `size` bytes of a path, bytes, or seekable file-like object (left where it was).
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            return file.read(size)
+    if hasattr(source, "read") and hasattr(source, "seek"):
+        position = source.tell()
+        try:
+            return source.read(size)
+        finally:
+            source.seek(position)
+    return None
+
+
+async def fetch_head(session, url, size=HEAD_SIZE, timeout=10):
+    #
+    # The first `size` bytes of `url`, with a single Range request. A server that
+    # ignores Range is only read up to `size`, and its connection dropped.
+    #
+    import aiohttp
+    async with session.get(url, headers={"Range": f"bytes=0-{size - 1}"},
+                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status >= 400:
+            return None
+        head = b""
+        while len(head) < size:
+            chunk = await response.content.read(size - len(head))
+            if not chunk:
+                break
+            head += chunk
+        if response.status != 206 and not response.content.at_eof():
+            response.close()
+        return head
+
+
+class PreflightResult:
+    #
+    # What preflight found for one conversion. `action` is "ok", "fixed" (the
+    # declared input format was wrong and is replaced by the detected one),
+    # "rejected" (see `problem`) or "unknown" (the source couldn't be read or
+    # recognized, so only the declared formats were checked).
+    #
+    __slots__ = ("name", "source", "declared", "detected", "output_format", "action", "problem")
+
+    def __init__(self, name, source, declared, detected, output_format, action, problem=None):
+        self.name = name
+        self.source = source
+        self.declared = declared
+        self.detected = detected
+        self.output_format = output_format
+        self.action = action
+        self.problem = problem
+
+    @property
+    def ok(self):
+        return self.action != "rejected"
+
+    @property
+    def input_format(self):
+        # The input format the conversion should be sent with.
+        return self.detected if self.action == "fixed" else self.declared
+
+    def __repr__(self):
+        detail = f": {self.problem}" if self.problem else ""
+        return f"<PreflightResult {self.name} {self.declared}->{self.output_format} detected={self.detected} {self.action}{detail}>"
+
+
+class PreflightError(ValueError):
+    # Raised with the rejected conversions of a job, before it is submitted.
+    def __init__(self, results):
+        super().__init__("Preflight failed: " + "; ".join(f"{result.name}: {result.problem}" for result in results))
+        self.results = results
+
+
+def identifiable(name):
+    # Whether sniff() positively recognizes files of format `name`, so a different detection means a wrong name.
+    name = name.lower()
+    return _ALIASES.get(name, name) in _SPECIFIC
+
+
+def check(head, output_format, input_format=None, filename=None, name=None, source=None, fix=True):
+    #
+    # Check one conversion against its source's first bytes (`head`, None if
+    # unreadable). The declared format is `input_format`, or else the extension
+    # of `filename` or of the source path or URL.
+    #
+    # Only a format sniff() identifies is fixed or rejected. A detected
+    # container (a TIFF-based camera RAW, a gzipped SVG, a zip comic book) or a
+    # declared format the sniffer doesn't know is left as it is.
+    #
+    declared = input_format or extension(filename) or extension(source)
+    detected = sniff(head) if head else None
+    action = "unknown"
+    actual = declared
+    problem = None
+    if detected is None or detected in CONTAINERS:
+        if detected is not None and declared and same_format(declared, detected):
+            action = "ok"
+    elif not declared:
+        # Nothing declared: tell the API what the file is.
+        action = "fixed" if fix else "ok"
+        actual = detected
+    elif same_format(declared, detected):
+        action = "ok"
+    elif identifiable(declared):
+        if fix:
+            action = "fixed"
+            actual = detected
+        else:
+            action = "rejected"
+            problem = f"declared as {declared} but the file is {detected}"
+    if action != "rejected" and actual and not can_convert(actual, output_format):
+        action = "rejected"
+        problem = f"{actual} can't be converted to {output_format}"
+        if declared and actual != declared:
+            problem += f" (declared as {declared})"
+    return PreflightResult(name, source, declared, detected, output_format, action, problem)
+
+
+async def inspect(session, source, output_format, input_format=None, filename=None, name=None, size=HEAD_SIZE, fix=True):
+    # check() on the first `size` bytes of a local source or URL (via `session`).
+    head = None
+    if isinstance(source, str) and source.startswith(("http://", "https://")):
+        import aiohttp
+        try:
+            head = await fetch_head(session, source, size)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            head = None
+    else:
+        try:
+            head = read_head(source, size)
+        except OSError:
+            head = None
+    return check(head, output_format, input_format, filename, name, source if isinstance(source, str) else None, fix)
+
+
+async def preflight_job(session, tasks, sources=None, fix=True, size=HEAD_SIZE, concurrency=32):
+    #
+    # Check every convert task of a `tasks` payload (or JobGraph) whose input is
+    # an import/url task, or an import/upload task with a local source in
+    # `sources` (task name -> path, bytes or file). Only the first `size` bytes
+    # of each source are read: from disk, or with a small Range GET through
+    # `session`. Wrong input formats are fixed in a copy of the payload when
+    # `fix` is set; conversions the file can't support raise PreflightError
+    # before anything is submitted. Returns the payload and the results.
+    #
+    #   tasks, results = await preflight_job(freeconvert.session, tasks)
+    #   job = await freeconvert.create_job(tasks)
+    #
+    if hasattr(tasks, "to_tasks"):
+        tasks = tasks.to_tasks()
+    sources = sources or {}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(name, task):
+        imported = tasks.get(task.get("input")) if isinstance(task.get("input"), str) else None
+        if imported is None:
+            return None
+        if imported.get("operation") == "import/url":
+            source = imported.get("url")
+        elif imported.get("operation") == "import/upload" and task["input"] in sources:
+            source = sources[task["input"]]
+        else:
+            return None
+        async with limit:
+            return await inspect(session, source, task.get("output_format", ""), task.get("input_format"),
+                                 imported.get("filename"), name, size, fix)
+
+    names = [name for name, task in tasks.items() if task.get("operation") == "convert"]
+    results = [result for result in await asyncio.gather(*(one(name, tasks[name]) for name in names)) if result]
+    rejected = [result for result in results if not result.ok]
+    if rejected:
+        raise PreflightError(rejected)
+    fixed = {result.name: result.detected for result in results if result.action == "fixed"}
+    if fixed:
+        tasks = dict(tasks)
+        for name, detected in fixed.items():
+            tasks[name] = {**tasks[name], "input_format": detected}
+    return tasks, results
+
+
+async def preflight_requests(session, requests, fix=True, size=HEAD_SIZE, concurrency=32):
+    #
+    # Check ConversionRequests (and BatchItems) before they are built into
+    # chains. Fixed input formats are set on the requests; returns one
+    # PreflightResult per request, and the caller drops the rejected ones.
+    # The declared format comes from the source's path or URL: a request's
+    # `filename` names the converted file.
+    #
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with limit:
+            result = await inspect(session, request.source, request.output_format, request.input_format,
+                                   None, None, size, fix)
+        result.name = request.source if isinstance(request.source, str) else repr(request)
+        if result.action == "fixed":
+            request.input_format = result.detected
+        return result
+
+    return list(await asyncio.gather(*(one(request) for request in requests)))
@@ -0,0 +1,187 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+# Endpoint classes with their own budgets.
+JOBS = "jobs"
+READS = "reads"
+UPLOADS = "uploads"
+
+# Requests per second and burst size for each endpoint class. None means unlimited.
+DEFAULT_LIMITS = {
+    JOBS: (10, 20),
+    READS: (20, 40),
+    UPLOADS: (10, 10),
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def classify(method, path):
+    # GET /process/... is a status read; any other API call creates something.
+    if method.upper() == "GET":
+        return READS
+    return JOBS
+
+
+def parse_retry_after(value):
+    # Retry-After is either delay-seconds or an HTTP date.
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    #
+    # Thread-safe token bucket. Callers reserve a token and are told how long to
+    # wait for it, so the same bucket can pace coroutines (`acquire`) and threads
+    # (`acquire_blocking`) of one process. The rate backs off multiplicatively
+    # when the server pushes back and recovers additively towards `max_rate`.
+    #
+    def __init__(self, rate, burst=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or (max(1, rate) if rate else 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # Take a token and return the seconds to wait before using it.
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self.rate is None:
+                return wait
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def available(self):
+        # Tokens that could be taken right now without waiting.
+        with self._lock:
+            now = time.monotonic()
+            if self._blocked_until > now:
+                return 0.0
+            if self.rate is None:
+                return float(self.burst)
+            return max(0.0, min(self.burst, self._tokens + (now - self._updated) * self.rate))
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def acquire_blocking(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        # Hold every caller for `seconds`, e.g. from a Retry-After header.
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def slow_down(self, factor=0.7):
+        with self._lock:
+            if self.rate is not None:
+                self.rate = max(self.rate * factor, self.max_rate * 0.05)
+
+    def speed_up(self, step=0.02):
+        with self._lock:
+            if self.rate is not None and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * step)
+
+
+class RateGovernor:
+    #
+    # Client-side rate limiting shared by every client, coroutine and thread that
+    # is given the same instance.
+    #
+    # Each endpoint class (job creation, status reads, uploads) has a TokenBucket.
+    # Responses feed back into it: 429s and `Retry-After` pause the class and lower
+    # its rate, an exhausted `X-RateLimit-Remaining` pauses it until the reset, and
+    # successes slowly restore the rate. `retry_delay` tells the client whether and
+    # when to retry: reads on 429/5xx and connection errors, writes only on 429
+    # (the request was rejected, so retrying can't create a duplicate).
+    #
+    #   governor = RateGovernor({"jobs": (5, 10)})
+    #   freeconvert = FreeConvertClient(api_key, governor=governor)
+    #
+    def __init__(self, limits=None, max_retries=5, backoff=0.5, max_backoff=30.0):
+        configured = dict(DEFAULT_LIMITS)
+        configured.update(limits or {})
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in configured.items()}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.throttled = 0
+        self.retries = 0
+
+    def bucket(self, endpoint):
+        if endpoint not in self.buckets:
+            self.buckets[endpoint] = TokenBucket(None)
+        return self.buckets[endpoint]
+
+    async def acquire(self, endpoint):
+        return await self.bucket(endpoint).acquire()
+
+    def headroom(self, endpoint):
+        # Fraction (0-1) of the endpoint class's burst that is available right now.
+        bucket = self.bucket(endpoint)
+        return bucket.available() / bucket.burst
+
+    def acquire_blocking(self, endpoint):
+        return self.bucket(endpoint).acquire_blocking()
+
+    def observe(self, endpoint, status, headers):
+        bucket = self.bucket(endpoint)
+        if status == 429:
+            self.throttled += 1
+            bucket.slow_down()
+            bucket.pause(parse_retry_after(headers.get("Retry-After")) or self.backoff)
+            return
+        if status < 400:
+            bucket.speed_up()
+
+        remaining = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                remaining, reset = int(remaining), float(reset)
+            except ValueError:
+                return
+            if remaining <= 0:
+                # Reset may be an epoch timestamp or seconds from now.
+                bucket.pause(reset - time.time() if reset > 1e9 else reset)
+
+    def retry_delay(self, method, status, headers, attempt):
+        # Seconds to wait before retrying, or None to give up. `status` is None for connection errors.
+        if attempt >= self.max_retries:
+            return None
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        if status == 429:
+            retry_after = parse_retry_after(headers.get("Retry-After")) if headers else None
+        elif idempotent and (status is None or status in RETRY_STATUSES):
+            retry_after = None
+        else:
+            return None
+        self.retries += 1
+        # Full jitter keeps workers that failed together from retrying together.
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
@@ -0,0 +1,186 @@
+import asyncio
+import copy
+import os
+
+from .graph import JobGraph, _as_list
+
+# errorCode assumed for failed tasks that report none.
+UNKNOWN_ERROR = "UNKNOWN"
+
+
+class RetryPolicy:
+    #
+    # How often a failed job may be resumed, by the error code of the tasks that
+    # failed on their own (not because an input failed). `max_attempts` counts
+    # resubmissions and always applies; `per_code` lowers it per errorCode, 0
+    # meaning "never retry", e.g. for a file that can't be converted at all.
+    #
+    #   RetryPolicy(max_attempts=3, per_code={"INVALID_FILE": 0}, delay=2)
+    #
+    def __init__(self, max_attempts=2, per_code=None, delay=0.0, backoff=2.0):
+        self.max_attempts = max_attempts
+        self.per_code = dict(per_code or {})
+        self.delay = delay
+        self.backoff = backoff
+
+    def attempts_for(self, error_code):
+        return self.per_code.get(error_code, self.max_attempts)
+
+    def allows(self, error_codes, attempt):
+        # `attempt` is the number of the resubmission about to be made, from 1.
+        if attempt > self.max_attempts:
+            return False
+        return all(attempt <= self.attempts_for(code) for code in error_codes or (UNKNOWN_ERROR,))
+
+    def delay_for(self, attempt):
+        return self.delay * self.backoff ** (attempt - 1)
+
+
+class RetryPlan:
+    # The part of a failed job to resubmit.
+    __slots__ = ("tasks", "reused", "rerun", "failures")
+
+    def __init__(self, tasks, reused, rerun, failures):
+        # `tasks` payload of the new job, with completed inputs replaced by their task IDs.
+        self.tasks = tasks
+        # Names of completed tasks whose results are reused, mapped to their task IDs.
+        self.reused = reused
+        self.rerun = rerun
+        # Names of the tasks that failed on their own, mapped to their errorCode.
+        self.failures = failures
+
+    @property
+    def error_codes(self):
+        # A job can fail with no task to blame (e.g. canceled or missing tasks): that counts as UNKNOWN_ERROR.
+        return set(self.failures.values()) or {UNKNOWN_ERROR}
+
+    def __repr__(self):
+        return f"<RetryPlan rerun={self.rerun} reused={sorted(self.reused)} failures={self.failures}>"
+
+
+def plan_retry(job, tasks=None):
+    #
+    # Work out how to resume a failed `job` (a job document with its tasks).
+    #
+    # `tasks` is the payload (dict or JobGraph) the job was created from; without
+    # it each task's `payload` from the job document is used. Every task that
+    # didn't complete is rerun under its original name, together with anything
+    # downstream of it, while completed tasks are passed to the new job as
+    # existing task IDs, so their imports and conversions aren't repeated.
+    #
+    if tasks is None:
+        tasks = {task["name"]: {**task["payload"], "operation": task["operation"]} for task in job["tasks"]}
+    graph = JobGraph(tasks.to_tasks() if hasattr(tasks, "to_tasks") else tasks)
+    documents = {task["name"]: task for task in job["tasks"]}
+
+    completed = {name for name in graph.tasks
+                 if name in documents and documents[name]["status"] == "completed"}
+    rerun = []
+    for name in graph.topological_order():
+        if name not in completed or any(value in rerun for value in graph.inputs(name)):
+            rerun.append(name)
+
+    failures = {}
+    for name in rerun:
+        document = documents.get(name)
+        if document is None or document["status"] != "failed":
+            continue
+        if any(value in rerun for value in graph.inputs(name)):
+            continue
+        failures[name] = (document.get("result") or {}).get("errorCode") or UNKNOWN_ERROR
+
+    reused = {}
+    payload = {}
+    for name in rerun:
+        task = copy.deepcopy(graph.tasks[name])
+        if "input" in task:
+            values = []
+            for value in _as_list(task["input"]):
+                if value in completed:
+                    reused[value] = documents[value]["id"]
+                    value = documents[value]["id"]
+                values.append(value)
+            task["input"] = values if isinstance(task["input"], (list, tuple)) else values[0]
+        payload[name] = task
+    return RetryPlan(payload, reused, rerun, failures)
+
+
+class RetryOutcome:
+    # Result of run_with_retries: every job submitted and the latest state of each task.
+    __slots__ = ("jobs", "tasks", "plans")
+
+    def __init__(self):
+        self.jobs = []
+        self.tasks = {}
+        self.plans = []
+
+    @property
+    def status(self):
+        return "completed" if all(task["status"] == "completed" for task in self.tasks.values()) else "failed"
+
+    @property
+    def attempts(self):
+        return len(self.jobs)
+
+    def __repr__(self):
+        return f"<RetryOutcome {self.status} jobs={[job['id'] for job in self.jobs]}>"
+
+
+def _start_positions(sources):
+    # Where each file object in `sources` starts, to rewind it for every upload; sources that can't be reread are refused.
+    positions = {}
+    for name, source in sources.items():
+        if isinstance(source, (str, bytes, bytearray, memoryview, os.PathLike)):
+            continue
+        if not (hasattr(source, "seekable") and source.seekable()):
+            raise ValueError(f"The source of '{name}' can't be uploaded again on a retry: pass a path, bytes or a seekable file")
+        positions[name] = source.tell()
+    return positions
+
+
+async def run_with_retries(client, poller, tasks, policy=None, sources=None, on_retry=None):
+    #
+    # Create a job from `tasks`, wait for it and, while it fails, resubmit only
+    # its failed branches as allowed by `policy` (a RetryPolicy).
+    #
+    # `sources` maps import/upload task names to the path, bytes or seekable file
+    # to upload, again whenever such a task is rerun (files are rewound first).
+    # Every import/upload task needs a source. `on_retry(plan, attempt)` is
+    # called before each resubmission. Returns a RetryOutcome; check its `status`.
+    #
+    policy = policy or RetryPolicy()
+    sources = sources or {}
+    positions = _start_positions(sources)
+    outcome = RetryOutcome()
+    payload = tasks.validate().to_tasks() if hasattr(tasks, "to_tasks") else tasks
+    attempt = 0
+    while True:
+        missing = [name for name, task in payload.items() if task.get("operation") == "import/upload" and name not in sources]
+        if missing:
+            # Nobody would upload to them, and the job would never finish.
+            raise ValueError(f"No source to upload for import/upload task(s) {', '.join(missing)}")
+        job = await client.create_job(payload)
+        uploads = [task for task in job["tasks"] if task["operation"] == "import/upload"]
+        for task in uploads:
+            if task["name"] in positions:
+                sources[task["name"]].seek(positions[task["name"]])
+        await asyncio.gather(*(client.upload(task["result"]["form"], sources[task["name"]]) for task in uploads))
+
+        job = await poller.wait_for_job(job["id"])
+        outcome.jobs.append(job)
+        for task in job["tasks"]:
+            outcome.tasks[task["name"]] = task
+        if job["status"] == "completed":
+            return outcome
+
+        attempt += 1
+        plan = plan_retry(job, tasks if attempt == 1 else payload)
+        outcome.plans.append(plan)
+        if not plan.rerun or not policy.allows(plan.error_codes, attempt):
+            return outcome
+        if on_retry is not None:
+            on_retry(plan, attempt)
+        delay = policy.delay_for(attempt)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload = plan.tasks
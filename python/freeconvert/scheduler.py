@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from .metrics import LATENCY_BUCKETS, Histogram
+
+# Priority classes, highest first.
+PRIORITIES = ("interactive", "default", "bulk")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    # Raised when queued work could not start before its deadline.
+    pass
+
+
+class _Ticket:
+    __slots__ = ("priority", "tenant", "deadline", "cost", "future", "enqueued_at")
+
+    def __init__(self, priority, tenant, deadline, cost, future):
+        self.priority = priority
+        self.tenant = tenant
+        self.deadline = deadline
+        self.cost = cost
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _Slot:
+    def __init__(self, scheduler, priority, tenant, deadline, cost):
+        self.scheduler = scheduler
+        self.args = (priority, tenant, deadline, cost)
+
+    async def __aenter__(self):
+        await self.scheduler.acquire(*self.args)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.scheduler.release()
+
+
+class SubmissionScheduler:
+    #
+    # Orders job submissions and uploads by priority, tenant and deadline.
+    #
+    # At most `capacity` pieces of work run at once. Waiting work is served
+    # strictly by priority class (PRIORITIES, highest first), and within a class
+    # by weighted fair queuing between tenants (`tenant_weights`, default 1), so
+    # one tenant's backfill can't starve the others. `reserved` slots can only
+    # be used by the top class, keeping room for interactive work however much
+    # bulk work is queued. Within a tenant, work with the earliest `deadline`
+    # (epoch seconds) goes first, and work that can't start before its deadline
+    # fails with DeadlineExceeded. Queue waits are recorded per class, and in
+    # `metrics` (a Metrics) when given.
+    #
+    #   scheduler = SubmissionScheduler(capacity=50, reserved=10)
+    #   job = await scheduler.submit(freeconvert.create_job, tasks, priority="interactive", tenant="acme")
+    #   async with scheduler.slot("bulk", tenant="backfill"):
+    #       await freeconvert.upload(form, path)
+    #
+    def __init__(self, capacity=50, reserved=0, priorities=PRIORITIES, tenant_weights=None, metrics=None):
+        if reserved >= capacity:
+            raise ValueError("reserved must be smaller than capacity")
+        self.capacity = capacity
+        self.reserved = reserved
+        self.priorities = tuple(priorities)
+        self.tenant_weights = dict(tenant_weights or {})
+        self.metrics = metrics
+        self.running = 0
+        self.expired = 0
+        self.waits = {priority: Histogram(LATENCY_BUCKETS) for priority in self.priorities}
+        # Per class: tenant -> heap of (deadline, seq, ticket).
+        self._queues = {priority: {} for priority in self.priorities}
+        # Per class: the virtual time and each tenant's last finish tag, for fair queuing.
+        self._virtual = {priority: 0.0 for priority in self.priorities}
+        self._finish = {priority: {} for priority in self.priorities}
+        self._counter = itertools.count()
+
+    def queued(self, priority=None):
+        priorities = [priority] if priority is not None else self.priorities
+        return sum(len(queue) for name in priorities for queue in self._queues[name].values())
+
+    @property
+    def stats(self):
+        return {
+            "running": self.running,
+            "expired": self.expired,
+            "queued": {priority: self.queued(priority) for priority in self.priorities},
+            "wait_p50": {priority: self.waits[priority].quantile(0.5) for priority in self.priorities},
+            "wait_p99": {priority: self.waits[priority].quantile(0.99) for priority in self.priorities},
+        }
+
+    def slot(self, priority="default", tenant=None, deadline=None, cost=1.0):
+        # async context manager around acquire/release.
+        return _Slot(self, priority, tenant, deadline, cost)
+
+    async def submit(self, function, *args, priority="default", tenant=None, deadline=None, cost=1.0, **kwargs):
+        # Run `await function(*args, **kwargs)` once scheduled.
+        async with self.slot(priority, tenant, deadline, cost):
+            return await function(*args, **kwargs)
+
+    async def acquire(self, priority="default", tenant=None, deadline=None, cost=1.0):
+        if priority not in self._queues:
+            raise ValueError(f"unknown priority {priority!r}, expected one of {self.priorities}")
+        if self.running < self._limit(priority) and not self.queued():
+            self.running += 1
+            self._record_wait(priority, 0.0)
+            return
+
+        ticket = _Ticket(priority, tenant, deadline, cost, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queues[priority].setdefault(tenant, []),
+                       (deadline if deadline is not None else float("inf"), next(self._counter), ticket))
+        self._dispatch()
+        timeout = deadline - time.time() if deadline is not None else None
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except asyncio.TimeoutError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Scheduled at the last moment: give the slot back.
+                self.release()
+            ticket.future.cancel()
+            self.expired += 1
+            raise DeadlineExceeded(f"{priority} work of {tenant!r} did not start before its deadline") from None
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self.release()
+            ticket.future.cancel()
+            raise
+
+    def release(self):
+        self.running -= 1
+        self._dispatch()
+
+    def _limit(self, priority):
+        # Slots a class may fill; everything below the top class leaves `reserved` free.
+        return self.capacity if priority == self.priorities[0] else self.capacity - self.reserved
+
+    def _dispatch(self):
+        for priority in self.priorities:
+            while self.running < self._limit(priority):
+                ticket = self._next(priority)
+                if ticket is None:
+                    break
+                self.running += 1
+                self._record_wait(priority, time.monotonic() - ticket.enqueued_at)
+                ticket.future.set_result(None)
+            if self.running >= self.capacity:
+                return
+
+    def _next(self, priority):
+        # Weighted fair queuing: the tenant whose next item would finish first in virtual time.
+        queues = self._queues[priority]
+        finish = self._finish[priority]
+        virtual = self._virtual[priority]
+        best = None
+        for tenant, queue in list(queues.items()):
+            # Drop work whose caller already gave up.
+            while queue and queue[0][2].future.done():
+                heapq.heappop(queue)
+            if not queue:
+                del queues[tenant]
+                continue
+            start = max(virtual, finish.get(tenant, 0.0))
+            tag = start + queue[0][2].cost / self.tenant_weights.get(tenant, 1.0)
+            if best is None or (tag, queue[0][0]) < best[:2]:
+                best = (tag, queue[0][0], tenant, start)
+        if best is None:
+            # Idle classes start over, so returning tenants aren't held back by old usage.
+            self._virtual[priority] = 0.0
+            finish.clear()
+            return None
+
+        tag, _, tenant, start = best
+        ticket = heapq.heappop(queues[tenant])[2]
+        if not queues[tenant]:
+            del queues[tenant]
+        finish[tenant] = tag
+        self._virtual[priority] = start
+        return ticket
+
+    def _record_wait(self, priority, seconds):
+        self.waits[priority].observe(seconds)
+        if self.metrics is not None:
+            self.metrics.observe("freeconvert_queue_wait_seconds", (("priority", priority),), seconds)
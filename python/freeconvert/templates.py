@@ -0,0 +1,151 @@
+import copy
+import json
+import os
+import re
+
+from .graph import JobGraph
+from .models import dumps
+
+# "{{name}}" marks a parameter slot in a template's string values.
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Slots are swapped for these markers before the payload is encoded once. json.dumps escapes the
+# NUL characters, so the markers can't collide with anything else in the encoded payload.
+_WHOLE = "\x00value:{}\x00"
+_INSIDE = "\x00text:{}\x00"
+_MARKER_PATTERN = re.compile(r'"\\u0000value:(\w+)\\u0000"|\\u0000text:(\w+)\\u0000')
+
+_MISSING = object()
+
+
+def _mark(value, defaults):
+    # Copy of `value` with its slots replaced by markers.
+    if isinstance(value, dict):
+        return {key: _mark(item, defaults) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_mark(item, defaults) for item in value]
+    if not isinstance(value, str):
+        return value
+    whole = SLOT_PATTERN.fullmatch(value)
+    if whole:
+        defaults.setdefault(whole.group(1), _MISSING)
+        return _WHOLE.format(whole.group(1))
+
+    def inside(match):
+        defaults.setdefault(match.group(1), _MISSING)
+        return _INSIDE.format(match.group(1))
+    return SLOT_PATTERN.sub(inside, value)
+
+
+class JobTemplate:
+    #
+    # A job shape that is validated and encoded once, then submitted many times.
+    #
+    # Any string value of the `tasks` payload may be a "{{name}}" slot, which
+    # takes any JSON value (a URL, a filename, a whole `options` object), or
+    # contain slots inside a longer string ("{{stem}}.jpg"). `slots` can also
+    # turn concrete values into slots by their dotted path, with the current
+    # value as the default, e.g. {"url": "myImport1.url"}; that is how exports of
+    # the FreeConvert Job Builder are parameterized (see `from_job_builder`).
+    #
+    # The payload is encoded to JSON fragments once; `render` only encodes the
+    # slot values and joins them with the fragments, so each submission skips
+    # building and serializing the nested dicts.
+    #
+    #   template = JobTemplate({
+    #       "myImport1": {"operation": "import/url", "url": "{{url}}"},
+    #       "myConvert1": {"operation": "convert", "input": "myImport1", "output_format": "jpg", "options": "{{options}}"},
+    #       "myExport1": {"operation": "export/url", "input": "myConvert1", "filename": "{{stem}}.jpg"},
+    #   }, defaults={"options": {}})
+    #   job = await freeconvert.create_job(template.render(url=url, stem="logo"))
+    #
+    def __init__(self, tasks, slots=None, defaults=None, **params):
+        if hasattr(tasks, "to_tasks"):
+            tasks = tasks.to_tasks()
+        tasks = copy.deepcopy(tasks)
+        self.defaults = {}
+        for name, path in (slots or {}).items():
+            self.defaults[name] = self._replace_path(tasks, path, "{{" + name + "}}")
+
+        marked = {}
+        marked_tasks = _mark(tasks, marked)
+        marked_params = _mark(params, marked)
+        for name, value in (defaults or {}).items():
+            self.defaults[name] = value
+        self.slots = tuple(marked)
+        unknown = set(self.defaults) - set(self.slots)
+        if unknown:
+            raise ValueError(f"defaults for unknown slots: {', '.join(sorted(unknown))}")
+
+        # Slots may hold any value, but not the operations and inputs that make up the graph.
+        for name, task in tasks.items():
+            for key in ("operation", "input"):
+                if SLOT_PATTERN.search(json.dumps(task.get(key))):
+                    raise ValueError(f"task '{name}': '{key}' can't be a template slot")
+        JobGraph(tasks).validate()
+
+        encoded = json.dumps({"tasks": marked_tasks, **marked_params}, separators=(",", ":"))
+        self._fragments = []
+        self._order = []
+        position = 0
+        for match in _MARKER_PATTERN.finditer(encoded):
+            self._fragments.append(encoded[position:match.start()].encode())
+            whole = match.group(1) is not None
+            self._order.append((match.group(1) if whole else match.group(2), whole))
+            position = match.end()
+        self._fragments.append(encoded[position:].encode())
+
+    @classmethod
+    def from_job_builder(cls, source, slots=None, defaults=None):
+        #
+        # Load a job exported from the FreeConvert Job Builder: a path to its
+        # JSON file, the JSON text, or the parsed dict. Its top-level "tasks" become
+        # the template's tasks and any other top-level fields (e.g. "tag") its
+        # parameters. `slots` maps slot names to dotted paths of values to replace.
+        #
+        if isinstance(source, bytes) or isinstance(source, str) and source.lstrip().startswith("{"):
+            source = json.loads(source)
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source) as file:
+                source = json.load(file)
+        source = dict(source)
+        tasks = source.pop("tasks")
+        return cls(tasks, slots, defaults, **source)
+
+    def render(self, **values):
+        # The encoded request body for POST /process/jobs, with `values` in the slots.
+        parts = [self._fragments[0]]
+        for (name, whole), fragment in zip(self._order, self._fragments[1:]):
+            value = values.get(name, _MISSING)
+            if value is _MISSING:
+                value = self.defaults.get(name, _MISSING)
+                if value is _MISSING:
+                    raise KeyError(f"no value for template slot '{name}'")
+            if whole:
+                parts.append(dumps(value))
+            else:
+                # Inside a string: the JSON-escaped text without its quotes.
+                parts.append(dumps(str(value))[1:-1])
+            parts.append(fragment)
+        return b"".join(parts)
+
+    def build(self, **values):
+        # The rendered payload's `tasks` dict, e.g. for inspection or JobGraph checks.
+        return json.loads(self.render(**values))["tasks"]
+
+    async def submit(self, client, **values):
+        return await client.create_job(self.render(**values))
+
+    @staticmethod
+    def _replace_path(tasks, path, placeholder):
+        keys = path.split(".")
+        container = tasks
+        for key in keys[:-1]:
+            container = container[int(key)] if isinstance(container, list) else container[key]
+        last = int(keys[-1]) if isinstance(container, list) else keys[-1]
+        value = container[last]
+        container[last] = placeholder
+        return value
+
+    def __repr__(self):
+        return f"<JobTemplate slots={list(self.slots)}>"
@@ -0,0 +1,111 @@
+import urllib.parse
+import aiohttp
+
+
+class HostStats:
+    __slots__ = ("host", "requests", "connections", "reused")
+
+    def __init__(self, host):
+        self.host = host
+        self.requests = 0
+        # New TCP (and TLS) connections opened, and requests sent on an idle keep-alive connection.
+        self.connections = 0
+        self.reused = 0
+
+    @property
+    def reuse_ratio(self):
+        # Share of requests that skipped the handshakes.
+        return self.reused / self.requests if self.requests else 0.0
+
+    def to_dict(self):
+        return {"requests": self.requests, "connections": self.connections, "reused": self.reused,
+                "reuse_ratio": round(self.reuse_ratio, 3)}
+
+    def __repr__(self):
+        return f"<HostStats {self.host} requests={self.requests} connections={self.connections} reused={self.reused}>"
+
+
+class UploadTransport:
+    #
+    # Keep-alive connection pools for upload targets, one per storage host.
+    #
+    # Upload forms point at storage hosts rather than the API, so uploads get
+    # their own pools: each host has a session whose connector keeps up to
+    # `limit_per_host` connections open for `keepalive_timeout` seconds, and
+    # files sent to the same host one after another reuse them instead of
+    # paying a new TCP and TLS handshake each. Large uploads also can't take
+    # the sockets API calls need. `stats` reports, per host, how many requests
+    # were sent and how many of them reused a connection.
+    #
+    # aiohttp speaks HTTP/1.1 only, so there is no HTTP/2 multiplexing; with
+    # keep-alive, `limit_per_host` is the number of uploads in flight per host.
+    #
+    #   transport = UploadTransport(limit_per_host=32)
+    #   freeconvert = FreeConvertClient(api_key, upload_transport=transport)
+    #   ...
+    #   print(transport.stats)
+    #
+    def __init__(self, limit_per_host=16, keepalive_timeout=60, dns_cache_ttl=300):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._sessions = {}
+        self._stats = {}
+
+    @staticmethod
+    def host_key(url):
+        # "scheme://host:port" of an upload URL; connections are only shared within one.
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return f"{parts.scheme}://{parts.hostname}:{port}"
+
+    def session_for(self, url):
+        # The pooled session for the host of `url`, created on first use inside the running loop.
+        key = self.host_key(url)
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            stats = self._stats.setdefault(key, HostStats(key))
+            connector = aiohttp.TCPConnector(limit=self.limit_per_host, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=self.dns_cache_ttl)
+            session = self._sessions[key] = aiohttp.ClientSession(connector=connector, trace_configs=[_trace(stats)])
+        return session
+
+    @property
+    def stats(self):
+        return {key: stats.to_dict() for key, stats in self._stats.items()}
+
+    def host_stats(self, url):
+        return self._stats.get(self.host_key(url))
+
+    async def close(self):
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __repr__(self):
+        return f"<UploadTransport hosts={len(self._sessions)} limit_per_host={self.limit_per_host}>"
+
+
+def _trace(stats):
+    trace = aiohttp.TraceConfig()
+
+    async def request_start(session, context, params):
+        stats.requests += 1
+
+    async def connection_created(session, context, params):
+        stats.connections += 1
+
+    async def connection_reused(session, context, params):
+        stats.reused += 1
+
+    trace.on_request_start.append(request_start)
+    trace.on_connection_create_end.append(connection_created)
+    trace.on_connection_reuseconn.append(connection_reused)
+    return trace
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+import uuid
+import aiohttp
+
+from .client import FreeConvertError
+
+# Size of each read from the upload source. Memory use stays at about one chunk
+# per upload, however large the file is.
+CHUNK_SIZE = 256 * 1024
+
+# Large uploads can take far longer than an API call, so only stalls time out.
+UPLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+
+
+class UploadProgress:
+    __slots__ = ("bytes_sent", "total_bytes", "started_at", "elapsed")
+
+    def __init__(self, total_bytes=None):
+        self.bytes_sent = 0
+        self.total_bytes = total_bytes
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        # Bytes per second since the upload started.
+        return self.bytes_sent / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fraction(self):
+        return self.bytes_sent / self.total_bytes if self.total_bytes else None
+
+    def __repr__(self):
+        return f"<UploadProgress {self.bytes_sent}/{self.total_bytes} bytes, {self.throughput / 1e6:.2f} MB/s>"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\r", "%0D").replace("\n", "%0A")
+
+
+def _source_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if hasattr(source, "seek") and hasattr(source, "tell"):
+        try:
+            position = source.tell()
+            size = source.seek(0, os.SEEK_END) - position
+            source.seek(position)
+            return size
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+async def _read_chunks(source, chunk_size):
+    loop = asyncio.get_running_loop()
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            while True:
+                chunk = await loop.run_in_executor(None, file.read, chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield bytes(view[offset:offset + chunk_size])
+    elif hasattr(source, "read"):
+        while True:
+            chunk = await loop.run_in_executor(None, source.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    elif hasattr(source, "__aiter__"):
+        async for chunk in source:
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+class MultipartStream:
+    #
+    # multipart/form-data body for an upload form, generated chunk by chunk.
+    #
+    # The form `parameters` are encoded up front (they are small); the file part
+    # is read lazily from `source`, which may be a path, a file-like object, bytes
+    # or any (async) iterable of bytes. When the source size is known the exact
+    # Content-Length is computed, so the body is sent without chunked encoding.
+    #
+    def __init__(self, parameters, source, filename=None, chunk_size=CHUNK_SIZE, progress=None):
+        self.boundary = uuid.uuid4().hex
+        self.source = source
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+        if filename is None:
+            filename = os.path.basename(source) if isinstance(source, (str, os.PathLike)) else "file"
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_escape(name)}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in parameters.items()
+        )
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{_escape(os.fspath(filename))}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self._head = head
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+
+        self.file_size = _source_size(source)
+        self.content_length = len(head) + self.file_size + len(self._tail) if self.file_size is not None else None
+        self.stats = UploadProgress(self.file_size)
+
+    @property
+    def headers(self):
+        headers = {"Content-Type": f"multipart/form-data; boundary={self.boundary}"}
+        if self.content_length is not None:
+            headers["Content-Length"] = str(self.content_length)
+        return headers
+
+    async def chunks(self):
+        stats = self.stats
+        stats.started_at = time.monotonic()
+        yield self._head
+        async for chunk in _read_chunks(self.source, self.chunk_size):
+            yield chunk
+            stats.bytes_sent += len(chunk)
+            stats.elapsed = time.monotonic() - stats.started_at
+            if self.progress is not None:
+                self.progress(stats)
+        yield self._tail
+        stats.elapsed = time.monotonic() - stats.started_at
+
+
+async def upload_file(session, form, source, filename=None, chunk_size=CHUNK_SIZE, progress=None):
+    #
+    # Submit `source` to an import/upload task's `result.form` with constant memory.
+    # `progress` is called with an UploadProgress after every chunk. Returns the
+    # final UploadProgress (bytes sent, elapsed seconds, throughput).
+    #
+    body = MultipartStream(form["parameters"], source, filename, chunk_size, progress)
+    async with session.post(form["url"], data=body.chunks(), headers=body.headers, timeout=UPLOAD_TIMEOUT) as response:
+        if response.status >= 400:
+            raise FreeConvertError(response.status, await response.text())
+    return body.stats
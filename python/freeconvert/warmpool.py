@@ -0,0 +1,175 @@
+import asyncio
+import collections
+import time
+
+from .cache import expiry_timestamp
+from .client import FreeConvertError
+
+
+class UploadPool:
+    #
+    # Keeps `size` import/upload tasks created ahead of time, so an upload can
+    # start streaming as soon as a file arrives instead of first waiting for
+    # POST /process/import/upload.
+    #
+    # Tasks are handed out oldest first and dropped `margin` seconds before they
+    # expire (their `expiresAt`, or `max_age` after creation, whichever is
+    # sooner). A background loop refills the pool, `refill_concurrency` tasks at
+    # a time, backing off while the API fails or hands out tasks that expire
+    # within `margin`. When the pool is empty, `acquire` creates a task on the
+    # spot, so it is never slower than not pooling.
+    #
+    #   pool = UploadPool(freeconvert, size=8)
+    #   task = await pool.acquire()
+    #   upload = asyncio.ensure_future(freeconvert.upload(task["result"]["form"], path))
+    #   job = await freeconvert.create_job({"convert": {"operation": "convert", "input": task["id"], ...}, ...})
+    #   await upload
+    #
+    def __init__(self, client, size=4, max_age=None, margin=60.0, refill_concurrency=2, max_backoff=30.0):
+        self.client = client
+        self.size = size
+        self.max_age = max_age
+        self.margin = margin
+        self.refill_concurrency = refill_concurrency
+        self.max_backoff = max_backoff
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.created = 0
+        # Why the latest refill failed; cleared once tasks are created again.
+        self.last_error = None
+        # (expires_at, task), oldest first.
+        self._idle = collections.deque()
+        self._creating = 0
+        self._wanted = None
+        self._changed = None
+        self._runner = None
+
+    def __len__(self):
+        return len(self._idle)
+
+    @property
+    def stats(self):
+        return {
+            "ready": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "created": self.created,
+        }
+
+    def start(self):
+        # Start filling the pool in the background; called by `acquire` if needed.
+        if self._runner is None or self._runner.done():
+            self._wanted = asyncio.Event()
+            self._changed = asyncio.Event()
+            self._runner = asyncio.ensure_future(self._refill())
+        return self
+
+    async def fill(self, timeout=60.0):
+        #
+        # Wait until the pool is full, e.g. before taking traffic. If tasks can't
+        # be created, raises `last_error`: at once when retrying can't help (the
+        # key is rejected, or `margin` is longer than tasks live), otherwise after
+        # `timeout` seconds (TimeoutError if nothing failed).
+        #
+        self.start()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        while len(self._idle) < self.size and not self._runner.done():
+            error = self.last_error
+            if isinstance(error, ValueError) or (isinstance(error, FreeConvertError) and error.status in (401, 403)):
+                raise error
+            remaining = deadline - loop.time() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise error or TimeoutError(f"UploadPool has {len(self._idle)} of {self.size} tasks after {timeout}s")
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire(self):
+        # An import/upload task with a ready `result.form`, used by nobody else.
+        self.start()
+        self._drop_expired()
+        if self._idle:
+            _, task = self._idle.popleft()
+            self.hits += 1
+            self._wanted.set()
+            return task
+        self.misses += 1
+        self._wanted.set()
+        return await self.client.create_task("import/upload")
+
+    async def close(self):
+        # Unused tasks are left to expire on the server.
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+        self._idle.clear()
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _drop_expired(self):
+        deadline = time.time() + self.margin
+        while self._idle and self._idle[0][0] <= deadline:
+            self._idle.popleft()
+            self.expired += 1
+
+    async def _create(self):
+        self._creating += 1
+        try:
+            task = await self.client.create_task("import/upload")
+        finally:
+            self._creating -= 1
+        expires_at = expiry_timestamp(task.get("expiresAt"))
+        if self.max_age is not None:
+            expires_at = min(expires_at or float("inf"), time.time() + self.max_age)
+        if expires_at is None:
+            expires_at = float("inf")
+        self.created += 1
+        if expires_at - self.margin <= time.time():
+            # It would be dropped at once and recreated in a loop: fail, so the refill backs off.
+            raise ValueError(f"import/upload task {task['id']} expires within margin={self.margin}s, lower the margin")
+        # Tasks created together can finish out of order; keep the deque sorted by expiry.
+        index = len(self._idle)
+        while index and self._idle[index - 1][0] > expires_at:
+            index -= 1
+        self._idle.insert(index, (expires_at, task))
+        self._changed.set()
+
+    async def _refill(self):
+        backoff = 0.0
+        while True:
+            self._drop_expired()
+            missing = self.size - len(self._idle) - self._creating
+            if missing <= 0:
+                self._wanted.clear()
+                # Sleep until a task is taken or the oldest one is about to expire.
+                expires_at = self._idle[0][0] if self._idle else float("inf")
+                timeout = expires_at - self.margin - time.time() if expires_at != float("inf") else None
+                try:
+                    await asyncio.wait_for(self._wanted.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            results = await asyncio.gather(
+                *(self._create() for _ in range(min(missing, self.refill_concurrency))), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                self.last_error = errors[0]
+                self._changed.set()
+                backoff = min(self.max_backoff, max(1.0, backoff * 2))
+                await asyncio.sleep(backoff)
+            else:
+                self.last_error = None
+                backoff = 0.0
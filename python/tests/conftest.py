@@ -0,0 +1,50 @@
+import asyncio
+import contextlib
+import inspect
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freeconvert import FreeConvertClient  # noqa: E402
+
+from benchmarks.mock_server import MockFreeConvert  # noqa: E402
+
+# No test should take anywhere near this long against the local mock server.
+TEST_TIMEOUT = 30
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    # `async def` tests run in a fresh event loop each, without needing a pytest plugin.
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(asyncio.wait_for(pyfuncitem.obj(**arguments), TEST_TIMEOUT))
+    return True
+
+
+@contextlib.asynccontextmanager
+async def _serve(delay=0.01, jitter=0.0, failure_rate=0.0, export_size=1024, **client_options):
+    server = MockFreeConvert(delay=delay, jitter=jitter, failure_rate=failure_rate, export_size=export_size)
+    base_url = await server.start()
+    freeconvert = FreeConvertClient("test", base_url=f"{base_url}/v1", **client_options)
+    try:
+        yield server, freeconvert
+    finally:
+        await freeconvert.close()
+        await server.stop()
+
+
+@pytest.fixture
+def mock_api():
+    #
+    # Starts the mock FreeConvert server of `benchmarks` and a client for it:
+    #
+    #   async def test_something(mock_api):
+    #       async with mock_api(delay=0.01) as (server, freeconvert):
+    #           ...
+    #
+    return _serve
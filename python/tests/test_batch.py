@@ -0,0 +1,41 @@
+import json
+import os
+
+from freeconvert import JobPoller
+from freeconvert.batch import read_manifest, run_batch, scan_directory
+
+
+def test_manifest_destinations_dont_collide(tmp_path):
+    manifest = tmp_path / "manifest.jsonl"
+    rows = [{"source": "a/report.pdf"}, {"source": "b/report.pdf"}, {"source": "https://example.com/report.docx?x=1"},
+            {"source": "c/summary.pdf", "destination": "out/summary.png"}, {"source": "d/summary.pdf"}]
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    items = list(read_manifest(str(manifest), "png", output_dir="out"))
+    assert [item.destination for item in items] == [
+        os.path.join("out", "report.png"), os.path.join("out", "report-1.png"), os.path.join("out", "report-2.png"),
+        "out/summary.png", os.path.join("out", "summary-1.png"),
+    ]
+
+
+def test_directory_destinations_dont_collide(tmp_path):
+    (tmp_path / "in" / "a").mkdir(parents=True)
+    for name in ("a/report.pdf", "a/report.docx", "report.pdf"):
+        (tmp_path / "in" / name).write_bytes(b"%PDF-1.7")
+    items = list(scan_directory(str(tmp_path / "in"), "png", output_dir="out"))
+    assert sorted(item.destination for item in items) == [
+        os.path.join("out", "a", "report-1.png"), os.path.join("out", "a", "report.png"), os.path.join("out", "report.png"),
+    ]
+
+
+async def test_run_batch_downloads_every_item(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        for name in ("a/report.pdf", "b/report.pdf"):
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_bytes(b"%PDF-1.7\n")
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text(f"source\n{tmp_path / 'a/report.pdf'}\n{tmp_path / 'b/report.pdf'}\n{tmp_path / 'missing.pdf'}\n")
+        items = await run_batch(freeconvert, poller, read_manifest(str(manifest), "png", output_dir=str(tmp_path / "out")))
+        assert [item.status for item in items] == ["completed", "completed", "failed"]
+        assert sorted(os.listdir(tmp_path / "out")) == ["report-1.png", "report.png"]
+        await poller.close()
@@ -0,0 +1,61 @@
+import json
+
+from freeconvert import JobPoller, ResultCache, cached_convert
+
+SOURCE = "https://cdn.freeconvert.com/logo_theme.svg"
+
+
+async def test_download_uses_cached_url(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        cache = ResultCache(str(tmp_path))
+        entry = await cached_convert(cache, freeconvert, poller, SOURCE, "jpg")
+        assert entry.path is None
+        entry = await cached_convert(cache, freeconvert, poller, SOURCE, "jpg", download=True)
+        assert len(server.jobs) == 1
+        with open(entry.path, "rb") as file:
+            assert len(file.read()) == server.export_size
+        assert cache.stats["hits"] == 1
+        await poller.close()
+
+
+async def test_download_reconverts_when_cached_url_is_gone(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        cache = ResultCache(str(tmp_path))
+        key = cache.key(SOURCE, "convert", output_format="jpg", options={})
+        cache.put_url(key, f"{server.base_url}/v1/process/jobs/gone")
+        entry = await cached_convert(cache, freeconvert, poller, SOURCE, "jpg", download=True)
+        assert len(server.jobs) == 1
+        assert entry.path is not None and entry.url.startswith(f"{server.base_url}/files/")
+        await poller.close()
+
+
+def test_index_is_an_append_log(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for name in ("a", "b", "c"):
+        cache.put_url(name, f"https://example.com/{name}")
+    cache.get("a")
+    cache.discard("b")
+    with open(tmp_path / "index.jsonl") as file:
+        assert len(file.readlines()) == 5
+    reopened = ResultCache(str(tmp_path))
+    assert list(reopened._entries) == ["c", "a"]
+
+
+def test_index_with_unknown_fields_and_torn_line(tmp_path):
+    with open(tmp_path / "index.jsonl", "w") as file:
+        file.write(json.dumps({"put": {"key": "a", "url": "https://example.com/a", "added_in": "a later version"}}) + "\n")
+        file.write('{"put": {"key": "b"')
+    cache = ResultCache(str(tmp_path))
+    assert cache.get("a").url == "https://example.com/a"
+    assert cache.get("b") is None
+
+
+def test_index_is_compacted(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for index in range(1500):
+        cache.put_url("a", f"https://example.com/{index}")
+    with open(tmp_path / "index.jsonl") as file:
+        assert len(file.readlines()) < 1000
+    assert ResultCache(str(tmp_path)).get("a").url == "https://example.com/1499"
@@ -0,0 +1,21 @@
+import pytest
+
+from freeconvert import FreeConvertError
+
+from benchmarks.run import WORKFLOWS
+
+
+async def test_create_and_get_job(mock_api):
+    async with mock_api() as (server, freeconvert):
+        job = await freeconvert.create_job(WORKFLOWS["convert"](0))
+        assert [task["name"] for task in job["tasks"]] == ["myImport1", "myConvert1", "myExport1"]
+        assert (await freeconvert.get_job(job["id"]))["id"] == job["id"]
+        assert (await freeconvert.get_task(job["tasks"][0]["id"]))["name"] == "myImport1"
+
+
+async def test_missing_job_raises(mock_api):
+    async with mock_api() as (server, freeconvert):
+        with pytest.raises(FreeConvertError) as error:
+            await freeconvert.get_job("missing")
+        assert error.value.status == 404
+        assert error.value.message == "Job not found"
@@ -0,0 +1,68 @@
+import collections
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from freeconvert import FreeConvertError, download_file
+
+
+async def test_zero_byte_export(mock_api, tmp_path):
+    async with mock_api(export_size=0) as (server, freeconvert):
+        path = tmp_path / "empty.bin"
+        download = await freeconvert.download(f"{server.base_url}/files/a/empty.bin", str(path))
+        assert path.read_bytes() == b""
+        assert download.bytes_received == 0
+
+
+async def test_ranged_download(mock_api, tmp_path):
+    async with mock_api(export_size=10_000) as (server, freeconvert):
+        path = tmp_path / "export.bin"
+        download = await download_file(freeconvert.session, f"{server.base_url}/files/a/export.bin", str(path),
+                                       connections=3, part_size=1000)
+        assert download.ranged
+        assert path.stat().st_size == 10_000
+        assert not (tmp_path / "export.bin.download.json").exists()
+
+
+async def _flaky_server(failures):
+    # Serves 2000 bytes in ranges; each part range answers 500 `failures` times first.
+    body = bytes(range(250)) * 8
+    attempts = collections.Counter()
+
+    async def handle(request):
+        requested = request.http_range
+        attempts[requested.start] += 1
+        if requested.stop - requested.start > 1 and attempts[requested.start] <= failures:
+            return web.Response(status=500)
+        headers = {"ETag": '"v1"', "Content-Range": f"bytes {requested.start}-{requested.stop - 1}/{len(body)}"}
+        return web.Response(status=206, body=body[requested.start:requested.stop], headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/file", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}/file", body, attempts
+
+
+async def test_part_retries_transient_errors(tmp_path):
+    runner, url, body, attempts = await _flaky_server(failures=1)
+    async with aiohttp.ClientSession() as session:
+        path = tmp_path / "file.bin"
+        await download_file(session, url, str(path), part_size=1000, retries=1)
+        assert path.read_bytes() == body
+    await runner.cleanup()
+
+
+async def test_part_retries_are_not_nested(tmp_path):
+    runner, url, body, attempts = await _flaky_server(failures=10)
+    async with aiohttp.ClientSession() as session:
+        with pytest.raises(FreeConvertError) as error:
+            await download_file(session, url, str(tmp_path / "file.bin"), part_size=1000, retries=1)
+        assert error.value.status == 500
+    # Byte 0 is also probed once, so count the second part.
+    assert attempts[1000] == 2
+    await runner.cleanup()
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from freeconvert import JobPoller, NotificationHub, download_exports
+from freeconvert.exports import export_filename
+
+from benchmarks.run import WORKFLOWS
+
+
+def _export(url=None, filename=None):
+    return {"id": "t1", "operation": "export/url", "result": {"url": url} if url else {},
+            "payload": {"filename": filename} if filename else {}}
+
+
+@pytest.mark.parametrize("url, name", [
+    ("https://s3.example.com/t1/my%20file.jpg?sig=1", "my file.jpg"),
+    ("https://s3.example.com/t1/..%2F..%2Fetc%2Fevil.sh", "evil.sh"),
+    ("https://s3.example.com/t1/%2Ftmp%2Fpwn", "pwn"),
+    ("https://s3.example.com/t1/..%5C..%5Cevil.bat", "evil.bat"),
+    ("https://s3.example.com/t1/..", "t1.bin"),
+    ("https://s3.example.com/t1/%2E%2E", "t1.bin"),
+    ("https://s3.example.com/t1/a%00b", "t1.bin"),
+    ("https://s3.example.com/", "t1.bin"),
+])
+def test_export_filename_stays_in_directory(url, name):
+    assert export_filename(_export(url)) == name
+
+
+def test_export_filename_falls_back_to_payload():
+    assert export_filename(_export("https://s3.example.com/", "../out.zip")) == "out.zip"
+    assert export_filename(_export(filename="..")) == "t1.bin"
+
+
+async def test_download_exports_by_polling(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        job = await freeconvert.create_job(WORKFLOWS["complex"](0))
+        final, paths = await download_exports(poller, freeconvert, job, str(tmp_path))
+        assert final["status"] == "completed"
+        assert sorted(os.path.basename(path) for path in paths.values()) == ["FinalPackage0.zip", "Thumbnail.jpg"]
+        await poller.close()
+
+
+async def test_download_exports_by_notifications(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        hub = NotificationHub("test", url=server.base_url, client=freeconvert)
+        job = await freeconvert.create_job(WORKFLOWS["complex"](0))
+        events = []
+        final, paths = await download_exports(hub, freeconvert, job, str(tmp_path), on_event=lambda *event: events.append(event[0]))
+        assert set(paths) == {"thumbnailExport", "finalExport"}
+        assert events.count("task_completed") == 2 and events[-1] == "job_completed"
+        await hub.close()
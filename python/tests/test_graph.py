@@ -0,0 +1,43 @@
+import pytest
+
+from freeconvert import JobGraph, JobGraphError
+
+
+def test_order_and_critical_path():
+    graph = JobGraph()
+    graph.add("a", "import/url", url="https://example.com/a.png")
+    graph.add("b", "import/url", url="https://example.com/b.png")
+    graph.add("merged", "merge", input=["a", "b"], output_format="pdf")
+    graph.add("thumb", "convert", input="a", output_format="jpg")
+    graph.add("export", "export/url", input=["merged", "thumb"])
+    order = graph.validate().topological_order()
+    assert order.index("a") < order.index("merged") < order.index("export")
+    assert order.index("thumb") < order.index("export")
+    assert graph.critical_path() == (["a", "merged", "export"], 5.0)
+    assert graph.parallel_width() == 2
+
+
+def test_long_chain_does_not_recurse():
+    # Added from the end, so every task is seen before its input.
+    graph = JobGraph()
+    graph.add("export", "export/url", input="step4999")
+    for index in range(4999, 0, -1):
+        graph.add(f"step{index}", "convert", input=f"step{index - 1}", output_format="pdf")
+    graph.add("step0", "import/url", url="https://example.com/in.pdf")
+    assert graph.validate().topological_order()[-1] == "export"
+    assert len(graph.critical_path()[0]) == 5001
+
+
+def test_cycle_is_reported_in_data_flow_order():
+    graph = JobGraph({
+        "in": {"operation": "import/url", "url": "https://example.com/a.png"},
+        "a": {"operation": "convert", "input": ["in", "c"]},
+        "b": {"operation": "convert", "input": "a"},
+        "c": {"operation": "convert", "input": "b"},
+        "out": {"operation": "export/url", "input": "c"},
+    })
+    with pytest.raises(JobGraphError) as error:
+        graph.validate()
+    assert error.value.problems == ["cycle a -> b -> c -> a"]
+    with pytest.raises(JobGraphError):
+        graph.topological_order()
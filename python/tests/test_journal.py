@@ -0,0 +1,59 @@
+from freeconvert import JobJournal, JobPoller, journaled_job
+
+from benchmarks.run import WORKFLOWS
+
+
+async def _submitted(journal, freeconvert, tasks):
+    key = journal.key(tasks)
+    journal.begin(key)
+    job = await freeconvert.create_job(tasks)
+    journal.submitted(key, job)
+    return key, job
+
+
+async def test_journaled_job_runs_once(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        with JobJournal(str(tmp_path / "jobs.db")) as journal:
+            tasks = WORKFLOWS["convert"](0)
+            first = await journaled_job(journal, freeconvert, poller, journal.key(tasks), tasks)
+            second = await journaled_job(journal, freeconvert, poller, journal.key(tasks), tasks)
+            assert first.status == second.status == "completed"
+            assert list(second.results) == ["myExport1"]
+            assert len(server.jobs) == 1
+        await poller.close()
+
+
+async def test_reattach_finishes_running_jobs(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        with JobJournal(str(tmp_path / "jobs.db")) as journal:
+            key, job = await _submitted(journal, freeconvert, WORKFLOWS["convert"](0))
+            finished = []
+            [entry] = await journal.reattach(poller, on_finished=finished.append)
+            assert entry.status == "completed" and entry.job_id == job["id"]
+            assert [entry.key for entry in finished] == [key]
+        await poller.close()
+
+
+async def test_reattach_timeout_keeps_the_job(mock_api, tmp_path):
+    async with mock_api(delay=5) as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01, timeout=0.1)
+        with JobJournal(str(tmp_path / "jobs.db")) as journal:
+            key, job = await _submitted(journal, freeconvert, WORKFLOWS["convert"](0))
+            [entry] = await journal.reattach(poller)
+            assert (entry.status, entry.job_id) == ("submitted", job["id"])
+            assert entry.error.startswith("Poll timeout")
+        await poller.close()
+
+
+async def test_reattach_resets_missing_jobs(mock_api, tmp_path):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        with JobJournal(str(tmp_path / "jobs.db")) as journal:
+            key, job = await _submitted(journal, freeconvert, WORKFLOWS["convert"](0))
+            del server.jobs[job["id"]]
+            [entry] = await journal.reattach(poller)
+            assert (entry.status, entry.job_id) == ("pending", None)
+            assert "Job not found" in entry.error
+        await poller.close()
@@ -0,0 +1,34 @@
+import pytest
+
+from freeconvert import KeyPool
+
+from benchmarks.run import WORKFLOWS
+
+
+async def test_jobs_stay_on_their_lane(mock_api):
+    async with mock_api() as (server, freeconvert):
+        async with KeyPool(["key-1", "key-2"], base_url=f"{server.base_url}/v1", max_in_flight=1,
+                           poller_options={"initial_interval": 0.01}) as pool:
+            jobs = []
+            for index in range(4):
+                async with pool.lease() as lane:
+                    jobs.append((await lane.create_job(WORKFLOWS["convert"](index)), lane))
+            for job, lane in jobs:
+                assert pool.lane_for(job["id"]) is lane
+                assert (await lane.wait_for_job(job["id"]))["status"] == "completed"
+            assert sorted(lane.jobs for lane in pool.lanes) == [2, 2]
+
+
+async def test_job_owners_are_bounded(mock_api):
+    async with mock_api() as (server, freeconvert):
+        async with KeyPool(["key-1"], base_url=f"{server.base_url}/v1", max_tracked_jobs=3) as pool:
+            ids = []
+            for index in range(5):
+                async with pool.lease() as lane:
+                    ids.append((await lane.create_job(WORKFLOWS["convert"](index)))["id"])
+            pool.lane_for(ids[2])
+            async with pool.lease() as lane:
+                ids.append((await lane.create_job(WORKFLOWS["convert"](5)))["id"])
+            assert list(pool._owners) == [ids[4], ids[2], ids[5]]
+            with pytest.raises(KeyError):
+                pool.lane_for(ids[0])
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from freeconvert import NotificationHub
+
+from benchmarks.run import WORKFLOWS
+
+
+async def test_watch_job_gets_events_without_rest_checks(mock_api):
+    async with mock_api(delay=0.05) as (server, freeconvert):
+        hub = NotificationHub("test", url=server.base_url, client=freeconvert, subscribe_check_delay=0.5)
+        jobs = [await freeconvert.create_job(WORKFLOWS["convert"](index)) for index in range(5)]
+        subscriptions = [await hub.watch_job(job["id"]) for job in jobs]
+        finished = await asyncio.gather(*subscriptions)
+        assert [job["status"] for job in finished] == ["completed"] * 5
+        requests = server.requests
+        await asyncio.sleep(0.6)
+        assert server.requests == requests == len(jobs)
+        assert hub.channels == []
+        await hub.close()
+
+
+async def test_job_finished_before_subscribe_settles(mock_api):
+    async with mock_api(delay=0) as (server, freeconvert):
+        hub = NotificationHub("test", url=server.base_url, client=freeconvert, subscribe_check_delay=0.1)
+        job = await freeconvert.create_job(WORKFLOWS["convert"](0))
+        await asyncio.sleep(0.1)
+        subscription = await hub.watch_job(job["id"])
+        assert (await subscription)["status"] == "completed"
+        assert subscription.event == "job_completed"
+        assert server.requests == 2
+        await hub.close()
+
+
+async def test_closed_hub_refuses_subscriptions(mock_api):
+    async with mock_api() as (server, freeconvert):
+        hub = NotificationHub("test", url=server.base_url)
+        await hub.watch_task("abc")
+        await hub.close()
+        with pytest.raises(RuntimeError):
+            await hub.watch_task("abc")
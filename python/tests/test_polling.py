@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from freeconvert import Job, JobPoller, Task
+
+from benchmarks.run import WORKFLOWS
+
+
+async def test_wait_for_job(mock_api):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        jobs = [await freeconvert.create_job(WORKFLOWS["convert"](index)) for index in range(5)]
+        finished = await asyncio.gather(*(poller.wait_for_job(job["id"]) for job in jobs))
+        assert [job["status"] for job in finished] == ["completed"] * 5
+        assert len(poller) == 0
+        await poller.close()
+
+
+async def test_cancelled_watch_is_not_reused(mock_api):
+    async with mock_api(delay=0.05) as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        job = await freeconvert.create_job(WORKFLOWS["convert"](0))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(poller.watch_job(job["id"]), 0.001)
+        assert (await poller.wait_for_job(job["id"]))["status"] == "completed"
+        assert len(poller) == 0
+        await poller.close()
+
+
+async def test_cancelled_watch_is_dropped(mock_api):
+    async with mock_api(delay=0.05) as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        job = await freeconvert.create_job(WORKFLOWS["convert"](0))
+        poller.watch_job(job["id"]).cancel()
+        await asyncio.sleep(0.05)
+        assert len(poller) == 0
+        await poller.close()
+
+
+async def test_timeout_does_not_overshoot(mock_api):
+    async with mock_api(delay=5) as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.05, backoff=100, max_interval=60, jitter=0)
+        job = await freeconvert.create_job(WORKFLOWS["convert"](0))
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            await poller.wait_for_job(job["id"], timeout=0.3)
+        assert time.monotonic() - started < 1
+        await poller.close()
+
+
+async def test_model_poller(mock_api):
+    async with mock_api() as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01, model=True)
+        job = await freeconvert.create_job(WORKFLOWS["convert"](0))
+        finished = await poller.wait_for_job(job["id"])
+        assert isinstance(finished, Job) and finished.status == "completed"
+        assert finished.task("myExport1").url.endswith("/my-converted-file0.jpg")
+        task = await poller.wait_for_task(job["tasks"][0]["id"])
+        assert isinstance(task, Task) and task.name == "myImport1"
+        exports = await poller.wait_for_tasks(job, ["myExport1"])
+        assert exports["myExport1"].status == "completed"
+        assert (await freeconvert.get_job(job["id"], model=True)).export_urls == finished.export_urls
+        await poller.close()
@@ -0,0 +1,45 @@
+from freeconvert.coalesce import ConversionRequest
+from freeconvert.preflight import check, preflight_requests, sniff
+
+# MPEG-1 layer III, 128 kbit/s, 44.1 kHz: 417-byte frames.
+MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+# AAC ADTS, 44.1 kHz, 16-byte frames.
+ADTS_FRAME = b"\xff\xf1\x50\x80\x02\x1f\xfc" + bytes(9)
+
+
+def test_sniff_valid_audio_frames():
+    assert sniff(MP3_FRAME * 3) == "mp3"
+    assert sniff(ADTS_FRAME * 8) == "aac"
+
+
+def test_sniff_ignores_false_frame_syncs():
+    # A sync without a second frame where the first one says it ends.
+    assert sniff(MP3_FRAME[:4] + bytes(1020)) is None
+    # Reserved version, bitrate and sample rate values.
+    assert sniff(b"\xff\xeb\x90\x64" + bytes(60)) is None
+    assert sniff(b"\xff\xfb\xf0\x64" + bytes(60)) is None
+    assert sniff(b"\xff\xfb\x9c\x64" + bytes(60)) is None
+    assert sniff(b"\xff\xe0\x00\x00\xff\xee") is None
+
+
+def test_utf16_text_is_not_mp3():
+    for encoding in ("utf-16-le", "utf-16-be"):
+        head = "﻿<!DOCTYPE html><html><body>page</body></html>".encode(encoding)
+        assert sniff(head) == "html"
+        assert check(head, "pdf", filename="page.html", fix=False).ok
+    assert sniff("﻿just some notes".encode("utf-16-le")) is None
+
+
+async def test_preflight_requests_declares_the_source_format(tmp_path):
+    path = tmp_path / "logo.svg"
+    path.write_bytes(b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"></svg>')
+    request = ConversionRequest(str(path), "png", filename="out.png")
+    [result] = await preflight_requests(None, [request], fix=False)
+    assert result.ok
+    assert result.declared == "svg"
+
+    # The source still can't pass as a video.
+    wrong = tmp_path / "clip.mp4"
+    wrong.write_bytes(path.read_bytes())
+    [result] = await preflight_requests(None, [ConversionRequest(str(wrong), "gif", filename="clip.gif")], fix=False)
+    assert not result.ok
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+from freeconvert import JobPoller, RetryPolicy, run_with_retries
+
+from benchmarks.run import WORKFLOWS
+
+
+class _Stream:
+    # A file object that can only be read once.
+    def read(self, size=-1):
+        return b""
+
+    def seekable(self):
+        return False
+
+
+async def test_rerun_upload_is_rewound(mock_api):
+    async with mock_api(failure_rate=1.0) as (server, freeconvert):
+        poller = JobPoller(freeconvert, initial_interval=0.01)
+        sent = []
+        upload = freeconvert.upload
+
+        async def counting_upload(form, source, **options):
+            progress = await upload(form, source, **options)
+            sent.append(progress.bytes_sent)
+            return progress
+
+        def on_retry(plan, attempt):
+            assert plan.rerun == ["myUpload1", "myConvert1", "myExport1"]
+            server.failure_rate = 0.0
+
+        freeconvert.upload = counting_upload
+        source = io.BytesIO(b"x" * 1000)
+        outcome = await run_with_retries(freeconvert, poller, WORKFLOWS["upload"](0), RetryPolicy(max_attempts=1),
+                                         sources={"myUpload1": source}, on_retry=on_retry)
+        assert outcome.status == "completed" and outcome.attempts == 2
+        assert sent == [1000, 1000]
+        await poller.close()
+
+
+async def test_non_seekable_source_is_refused(mock_api):
+    async with mock_api() as (server, freeconvert):
+        with pytest.raises(ValueError):
+            await run_with_retries(freeconvert, None, WORKFLOWS["upload"](0), sources={"myUpload1": _Stream()})
+        assert server.jobs == {}
+
+
+async def test_upload_without_source_fails_fast(mock_api):
+    async with mock_api() as (server, freeconvert):
+        with pytest.raises(ValueError, match="myUpload1"):
+            await run_with_retries(freeconvert, None, WORKFLOWS["upload"](0))
+        assert server.jobs == {}
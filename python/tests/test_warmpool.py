@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from freeconvert import FreeConvertClient, FreeConvertError, UploadPool
+
+
+async def test_fill_and_acquire(mock_api):
+    async with mock_api() as (server, freeconvert):
+        async with UploadPool(freeconvert, size=3) as pool:
+            await pool.fill(timeout=5)
+            assert len(pool) == 3
+            task = await pool.acquire()
+            assert task["operation"] == "import/upload" and task["result"]["form"]["url"]
+            assert pool.stats["hits"] == 1
+
+
+async def test_fill_gives_up_when_creation_keeps_failing(mock_api):
+    async with mock_api() as (server, freeconvert):
+        broken = FreeConvertClient("test", base_url=f"{server.base_url}/v0")
+        async with UploadPool(broken, size=2) as pool:
+            with pytest.raises(FreeConvertError):
+                await pool.fill(timeout=0.3)
+        await broken.close()
+
+
+async def test_margin_longer_than_task_lifetime(mock_api):
+    async with mock_api() as (server, freeconvert):
+        async with UploadPool(freeconvert, size=2, max_age=1, margin=5) as pool:
+            with pytest.raises(ValueError, match="margin"):
+                await pool.fill(timeout=5)
+            # The refill backs off instead of recreating tasks in a loop.
+            await asyncio.sleep(0.5)
+            assert server.requests <= 2